@@ -1,25 +1,140 @@
+import atexit
+import base64
+import hashlib
+import itertools
+import gzip
 import json
+import mimetypes
+import multiprocessing
 import os
+import queue
+import re
 import smtplib
 import sqlite3
+import threading
+import time
 import uuid
-from datetime import datetime, timedelta
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from email.message import EmailMessage
+from functools import partial
 
-from flask import Flask, jsonify, request, send_from_directory
+import click
+from flask import Flask, Response, jsonify, request, send_file, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
 import csv
+import io
 from io import StringIO
 
+import password_jobs
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON codec
+    orjson = None
+try:
+    import brotli
+except ImportError:  # optional: br content encoding
+    brotli = None
+
+# --- JSON Codec ---
+# Documents are decoded and encoded with orjson when it is installed;
+# JSON_CODEC=json forces the standard library.
+JSON_CODEC = os.getenv("JSON_CODEC", "orjson" if orjson else "json")
+if JSON_CODEC not in {"orjson", "json"}:
+    raise RuntimeError(f"Unknown JSON_CODEC: {JSON_CODEC}")
+if JSON_CODEC == "orjson" and orjson is None:
+    raise RuntimeError("JSON_CODEC=orjson requires the orjson package")
+
+
+def json_loads(text):
+    stats = request_stats()
+    started = time.perf_counter() if stats else 0.0
+    value = orjson.loads(text) if JSON_CODEC == "orjson" else json.loads(text)
+    if stats:
+        stats.json_decode_seconds += time.perf_counter() - started
+    return value
+
+
+def json_dumps(value):
+    stats = request_stats()
+    started = time.perf_counter() if stats else 0.0
+    text = None
+    if JSON_CODEC == "orjson":
+        try:
+            text = orjson.dumps(value).decode()
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits, which only the stdlib encodes
+    if text is None:
+        text = json.dumps(value)
+    if stats:
+        stats.json_encode_seconds += time.perf_counter() - started
+    return text
+
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, routed through the configured codec."""
+
+    def orjson_args(self, kwargs):
+        """(option, default) for orjson equivalent to json.dumps ``kwargs``, or None.
+
+        Covers what jsonify passes: compact separators or indent=2, plus
+        sort_keys. Dates still go through ``default`` so they render as
+        with the stdlib. orjson always writes UTF-8, so ensure_ascii is moot.
+        """
+        kwargs = dict(kwargs)
+        default = kwargs.pop("default", self.default)
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.pop("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        indent = kwargs.pop("indent", None)
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        elif indent is not None:
+            return None
+        separators = kwargs.pop("separators", None)
+        if separators is not None and tuple(separators) != (",", ":"):
+            return None
+        kwargs.pop("ensure_ascii", None)
+        if kwargs:
+            return None
+        return option, default
+
+    def dumps(self, obj, **kwargs):
+        stats = request_stats()
+        started = time.perf_counter() if stats else 0.0
+        text = None
+        args = self.orjson_args(kwargs) if JSON_CODEC == "orjson" else None
+        if args:
+            option, default = args
+            try:
+                text = orjson.dumps(obj, default=default, option=option).decode()
+            except TypeError:
+                pass  # e.g. non-string keys or integers wider than 64 bits
+        if text is None:
+            text = super().dumps(obj, **kwargs)
+        if stats:
+            stats.json_encode_seconds += time.perf_counter() - started
+        return text
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return json_loads(s)
+
+
 # --- Flask Initialization ---
 app = Flask(__name__)
+app.json = CodecJSONProvider(app)
 CORS(app)
 
 # --- Paths & Constants ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "assetflow.db")
+DB_PATH = os.getenv("DB_PATH", os.path.join(BASE_DIR, "assetflow.db"))
 FRONTEND_DIST_DIR = os.path.join(BASE_DIR, "frontend", "dist")
 LEGACY_FRONTEND = os.path.join(BASE_DIR, "appupdate.html")
 FRONTEND_ENTRY = "index.html"
@@ -49,45 +164,1522 @@ SMTP_CONFIG = {
     "password": os.getenv("SMTP_PASS", ""),
     "from_email": os.getenv("SMTP_FROM_EMAIL", os.getenv("SMTP_USER", "")),
     "use_tls": os.getenv("SMTP_USE_TLS", "true").lower() == "true",
+    "timeout_seconds": float(os.getenv("SMTP_TIMEOUT_SECONDS", "10")),
+}
+# Outbound mail is queued and sent by a background worker.
+MAIL_CONFIG = {
+    "queue_size": int(os.getenv("MAIL_QUEUE_SIZE", "1000")),
+    "batch_size": int(os.getenv("MAIL_BATCH_SIZE", "20")),
+    "max_attempts": int(os.getenv("MAIL_MAX_ATTEMPTS", "5")),
+    "backoff_seconds": float(os.getenv("MAIL_BACKOFF_SECONDS", "1")),
+    "idle_seconds": float(os.getenv("MAIL_IDLE_SECONDS", "30")),
+}
+
+# --- Password Hashing ---
+# Hashes are computed in a process pool so the KDF does not hold the GIL of
+# the request-serving process. PASSWORD_WORKERS=0 hashes inline.
+PASSWORD_CONFIG = {
+    "method": os.getenv("PASSWORD_HASH_METHOD", "scrypt"),
+    "workers": int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    "max_pending": int(os.getenv("PASSWORD_MAX_PENDING", "32")),
+}
+
+# --- Database Configuration ---
+# A pool size of 0 disables pooling and opens a fresh connection per checkout.
+DB_CONFIG = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "8")),
+    "busy_timeout_ms": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),
+    "journal_mode": os.getenv("DB_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("DB_SYNCHRONOUS", "NORMAL"),
+    "cache_size": int(os.getenv("DB_CACHE_SIZE", "-16000")),  # negative = KiB
+    "mmap_size": int(os.getenv("DB_MMAP_SIZE", str(128 * 1024 * 1024))),
+}
+
+# --- Pagination ---
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# --- Change Log ---
+CHANGES_DEFAULT_LIMIT = 500
+CHANGES_MAX_LIMIT = 5000
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+
+# --- Server-Sent Events ---
+# Each open stream holds a request handler for its whole life: a parked
+# greenlet under gevent, an OS thread otherwise. An empty max_subscribers
+# picks a cap that suits the worker model (see sse_subscriber_limit()).
+SSE_CONFIG = {
+    "max_subscribers": os.getenv("SSE_MAX_SUBSCRIBERS", ""),
+    "gevent_max_subscribers": 500,
+    "threaded_max_subscribers": 4,
+    "queue_size": int(os.getenv("SSE_QUEUE_SIZE", "1000")),
+    "heartbeat_seconds": float(os.getenv("SSE_HEARTBEAT_SECONDS", "15")),
+    "replay_limit": 1000,
+}
+
+# --- Full-Text Search ---
+# Indexed document fields per collection as (title fields, body fields);
+# title matches rank higher.
+SEARCH_FIELDS = {
+    "assets": (
+        ["name", "asset_id"],
+        ["serial_number", "manufacturer", "model", "category", "location", "description", "notes"],
+    ),
+    "vendors": (
+        ["vendor_name"],
+        ["contact_person", "email", "phone", "category", "website", "notes"],
+    ),
+    "properties": (
+        ["property_name"],
+        ["property_type", "address", "city", "state", "postal_code", "property_manager", "notes"],
+    ),
+}
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# --- Bulk Operations ---
+BULK_MAX_OPERATIONS = int(os.getenv("BULK_MAX_OPERATIONS", "5000"))
+
+# --- Asset CSV Import/Export ---
+# Header -> document field, shared by the export and the import so a
+# downloaded report can be uploaded again unchanged.
+ASSET_CSV_COLUMNS = [
+    ("Asset ID", "asset_id"),
+    ("Name", "name"),
+    ("Category", "category"),
+    ("Status", "status"),
+    ("Purchase Date", "purchase_date"),
+    ("Purchase Value", "purchase_value"),
+    ("Current Value", "current_value"),
+    ("Serial Number", "serial_number"),
+    ("Manufacturer", "manufacturer"),
+    ("Warranty Expiry", "warranty_expiry"),
+    ("Assigned To", "assigned_to_email"),
+    ("Owner", "owner_email"),
+    ("Location", "location"),
+    ("Created Date", "created_date"),
+]
+ASSET_CATEGORIES = {
+    "computer", "mobile_device", "furniture", "vehicle", "software_license",
+    "office_equipment", "machinery", "networking", "other",
 }
+ASSET_STATUSES = {"active", "in_maintenance", "retired", "lost", "in_storage"}
+CSV_IMPORT_BATCH_SIZE = int(os.getenv("CSV_IMPORT_BATCH_SIZE", "1000"))
+CSV_IMPORT_MAX_ERRORS = 1000
+CSV_EXPORT_CHUNK_SIZE = int(os.getenv("CSV_EXPORT_CHUNK_SIZE", "500"))
+# Fields that never leave the server, whatever columns an export asks for.
+EXPORT_EXCLUDED_FIELDS = {"password_hash"}
+
+# --- PDF Report Jobs ---
+REPORT_CONFIG = {
+    "cache_dir": os.getenv("REPORT_CACHE_DIR", os.path.join(BASE_DIR, "uploads", "reports")),
+    "workers": int(os.getenv("REPORT_WORKERS", "2")),
+    "stale_seconds": int(os.getenv("REPORT_STALE_SECONDS", "600")),
+}
+os.makedirs(REPORT_CONFIG["cache_dir"], exist_ok=True)
+REPORT_EXECUTOR = ThreadPoolExecutor(max_workers=REPORT_CONFIG["workers"], thread_name_prefix="report")
+REPORT_JOBS: dict[str, object] = {}
+REPORT_JOBS_LOCK = threading.RLock()
+REPORT_JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{24}-\d+-\d+$")
+
+# --- Property Images ---
+# Uploads are stored under their SHA-256 (content-addressed, so identical
+# uploads share one file) and resized into the variants below off the
+# request thread when Pillow is installed.
+IMAGE_CONFIG = {
+    "max_upload_bytes": int(os.getenv("IMAGE_MAX_UPLOAD_BYTES", str(5 * 1024 * 1024))),
+    "workers": int(os.getenv("IMAGE_WORKERS", "2")),
+    "variants": {"thumb": 320, "preview": 1280},  # longest side in pixels
+}
+IMAGE_EXECUTOR = ThreadPoolExecutor(max_workers=IMAGE_CONFIG["workers"], thread_name_prefix="images")
+CONTENT_IMAGE_PATTERN = re.compile(r"^[0-9a-f]{64}\.(png|jpg|gif|webp)$")
+# Leading bytes identifying each accepted format; the stored extension
+# comes from the content, not the client's filename.
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+]
+
+# --- Response Compression ---
+# API responses are compressed per request; frontend files once at startup
+# with the slower, stronger static settings.
+COMPRESSION_CONFIG = {
+    "min_size": int(os.getenv("COMPRESS_MIN_SIZE", "1024")),
+    "gzip_level": int(os.getenv("COMPRESS_GZIP_LEVEL", "6")),
+    "brotli_quality": int(os.getenv("COMPRESS_BROTLI_QUALITY", "5")),
+    "static_gzip_level": 9,
+    "static_brotli_quality": 11,
+}
+COMPRESSIBLE_MIMETYPES = {
+    "application/json", "application/javascript", "text/javascript", "text/css",
+    "text/html", "text/csv", "text/plain", "image/svg+xml",
+}
+# Vite emits content-hashed bundles such as assets/index-4f3a9c1b.js.
+HASHED_ASSET_PATTERN = re.compile(r"^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# --- Request Metrics ---
+# Per-request timings feed the Server-Timing header, /metrics (Prometheus
+# text format) and a log line for requests slower than SLOW_REQUEST_MS.
+# Set METRICS_TOKEN to require "Authorization: Bearer <token>" on /metrics.
+METRICS_CONFIG = {
+    "enabled": os.getenv("METRICS_ENABLED", "true").lower() == "true",
+    "server_timing": os.getenv("SERVER_TIMING", "true").lower() == "true",
+    "slow_request_ms": float(os.getenv("SLOW_REQUEST_MS", "1000")),
+    "token": os.getenv("METRICS_TOKEN", ""),
+}
+METRICS_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# --- Auth Sessions & OTPs ---
+# "sqlite" shares sessions and OTPs between worker processes through the
+# database; "memory" keeps them in this process (single worker only).
+SESSION_CONFIG = {
+    "backend": os.getenv("SESSION_STORE", "sqlite"),
+    "ttl_seconds": int(os.getenv("SESSION_TTL_SECONDS", str(7 * 24 * 3600))),
+    "otp_ttl_seconds": 300,
+    "cleanup_interval_seconds": int(os.getenv("SESSION_CLEANUP_INTERVAL_SECONDS", "300")),
+}
+
+USER_CACHE_CONFIG = {
+    "max_size": int(os.getenv("USER_CACHE_SIZE", "1024")),
+    "ttl_seconds": float(os.getenv("USER_CACHE_TTL_SECONDS", "60")),
+}
+
+
+# --- Authenticated User Cache ---------------------------------------------
+class UserCache:
+    """Bounded LRU/TTL cache of session email -> user document.
+
+    Writes to the users collection invalidate affected entries. A generation
+    counter stops a lookup that raced with an invalidation from caching the
+    stale document it read. Entries also remember the version of the user's
+    document they were read at (from the session lookup) and are only served
+    while it is unchanged, so writes made by other worker processes take
+    effect immediately and only for the user they touched.
+    """
+
+    def __init__(self, max_size, ttl_seconds):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, email, version):
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry and entry[0] > time.monotonic() and entry[1] == version:
+                self._entries.move_to_end(email)
+                self.hits += 1
+                return dict(entry[2])
+            if entry:
+                del self._entries[email]
+            self.misses += 1
+            return None
+
+    def put(self, email, user, generation, version):
+        """Cache ``user`` as read at document ``version`` (taken before the read)."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[email] = (time.monotonic() + self.ttl_seconds, version, dict(user))
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, email=None, user_id=None):
+        with self._lock:
+            self.generation += 1
+            if email:
+                self._entries.pop(email, None)
+            if user_id:
+                for key in [k for k, (_, _, user) in self._entries.items() if user.get("id") == user_id]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
 
-# --- Auth/OTP Stores (In-Memory) ---
-OTP_STORE: dict[str, dict] = {}
-SESSIONS: set[str] = set()
+USER_CACHE = UserCache(USER_CACHE_CONFIG["max_size"], USER_CACHE_CONFIG["ttl_seconds"])
+
+
+# --- Event Broker ---------------------------------------------------------
+class Subscription:
+    """One SSE client's bounded event queue."""
+
+    def __init__(self, user, queue_size):
+        self.user = user
+        self.events = queue.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+
+def gevent_patched():
+    """Whether gevent has monkey-patched this process, making blocking waits cooperative."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("threading")
+
+
+def sse_subscriber_limit():
+    """SSE_MAX_SUBSCRIBERS if set, else a default for the worker model.
+
+    Outside gevent every stream pins a server thread, so only a few may
+    be open before they starve the rest of the API.
+    """
+    if SSE_CONFIG["max_subscribers"]:
+        return int(SSE_CONFIG["max_subscribers"])
+    if gevent_patched():
+        return SSE_CONFIG["gevent_max_subscribers"]
+    return SSE_CONFIG["threaded_max_subscribers"]
+
+
+class EventBroker:
+    """In-process pub/sub for committed writes.
+
+    db_transaction() publishes the changes a transaction logged once it
+    commits. Subscribers only hold a queue, so an idle SSE stream costs a
+    blocked queue read; under a gevent worker that is a parked greenlet
+    rather than an OS thread. A subscriber that falls too far behind is
+    marked overflowed and told to resync instead of growing without bound.
+    """
+
+    def __init__(self, max_subscribers, queue_size):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, user):
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(user, self.queue_size)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, events):
+        """Fan (seq, collection, op, doc_id, document JSON) tuples out to subscribers."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers or not events:
+            return
+        for seq, collection, op, doc_id, text in events:
+            event = {"seq": seq, "collection": collection, "op": op, "id": doc_id,
+                     "document": json_loads(text)}
+            for subscription in subscribers:
+                if subscription.overflowed:
+                    continue
+                try:
+                    subscription.events.put_nowait(event)
+                except queue.Full:
+                    subscription.overflowed = True
+
+
+EVENT_BROKER = EventBroker(sse_subscriber_limit(), SSE_CONFIG["queue_size"])
+
+
+# --- Outbound Mail Dispatcher ---------------------------------------------
+class MailDispatcher:
+    """Sends queued EmailMessages from a background thread over a reused SMTP connection.
+
+    The worker takes up to ``batch_size`` queued messages at a time and sends
+    them over one authenticated connection, which stays open until it has
+    been idle for ``idle_seconds``. Transient failures reconnect and retry
+    with exponential backoff; a message is given up after ``max_attempts``
+    or on a permanent (5xx) rejection, and its ``on_failure`` callback runs.
+    The worker starts on first use and again in a forked child.
+    """
+
+    def __init__(self, smtp_config, config):
+        self.smtp_config = smtp_config
+        self.config = config
+        self._lock = threading.Lock()
+        self._pid = None
+        self._jobs = None
+        self._thread = None
+        self._server = None
+
+    def send(self, message, on_failure=None):
+        """Queue ``message``; returns False if the queue is full."""
+        self._ensure_worker()
+        try:
+            self._jobs.put_nowait((message, on_failure))
+        except queue.Full:
+            return False
+        return True
+
+    def stop(self, timeout=5.0):
+        """Send what is queued, then stop the worker (called at exit)."""
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                return
+            thread, jobs = self._thread, self._jobs
+        try:
+            jobs.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._jobs = queue.Queue(maxsize=self.config["queue_size"])
+            self._server = None
+            self._thread = threading.Thread(target=self._run, args=(self._jobs,), name="mail", daemon=True)
+            self._thread.start()
+
+    def _run(self, jobs):
+        while True:
+            try:
+                job = jobs.get(timeout=self.config["idle_seconds"])
+            except queue.Empty:
+                self._disconnect()
+                continue
+            batch, stopping = [], job is None
+            while job is not None:
+                batch.append(job)
+                if len(batch) >= self.config["batch_size"]:
+                    break
+                try:
+                    job = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                stopping = job is None
+            if batch:
+                self._deliver(batch)
+            if stopping:
+                self._disconnect()
+                return
+
+    def _deliver(self, batch):
+        pending = batch
+        for attempt in range(1, self.config["max_attempts"] + 1):
+            failed, error = [], None
+            for index, (message, on_failure) in enumerate(pending):
+                try:
+                    self._connection().send_message(message)
+                    print(f"[MAIL] Sent \"{message['Subject']}\" to {message['To']}")
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as exc:
+                    code = getattr(exc, "smtp_code", 550)
+                    if code >= 500:
+                        self._give_up(message, on_failure, exc)
+                        continue
+                    error, failed = exc, pending[index:]
+                except (OSError, smtplib.SMTPException) as exc:
+                    error, failed = exc, pending[index:]
+                if failed:
+                    # The connection is suspect; retry the rest on a new one.
+                    self._disconnect()
+                    break
+            if not failed:
+                return
+            pending = failed
+            if attempt < self.config["max_attempts"]:
+                delay = self.config["backoff_seconds"] * 2 ** (attempt - 1)
+                print(f"[MAIL] Send failed ({error}); retrying {len(pending)} message(s) in {delay:g}s")
+                time.sleep(delay)
+        for message, on_failure in pending:
+            self._give_up(message, on_failure, error)
+
+    def _give_up(self, message, on_failure, exc):
+        print(f"[MAIL] Giving up on \"{message['Subject']}\" to {message['To']}: {exc}")
+        if on_failure:
+            on_failure(exc)
+
+    def _connection(self):
+        if self._server is None:
+            config = self.smtp_config
+            server = smtplib.SMTP(config["host"], config["port"], timeout=config["timeout_seconds"])
+            try:
+                if config["use_tls"]:
+                    server.starttls()
+                if config["user"]:
+                    server.login(config["user"], config["password"])
+            except BaseException:
+                server.close()
+                raise
+            self._server = server
+        return self._server
+
+    def _disconnect(self):
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except (OSError, smtplib.SMTPException):
+            server.close()
+
+
+MAIL_DISPATCHER = MailDispatcher(SMTP_CONFIG, MAIL_CONFIG)
+atexit.register(MAIL_DISPATCHER.stop)
+
+
+# --- Password Hasher ------------------------------------------------------
+class PasswordHasherBusy(Exception):
+    """More password hashes are pending than PASSWORD_CONFIG["max_pending"]."""
+
+
+class PasswordHasher:
+    """Runs password hashing and verification on a bounded process pool.
+
+    At most ``max_pending`` jobs may be queued or running per process (also
+    when hashing inline); past that, calls raise PasswordHasherBusy instead
+    of queueing, so a login burst is shed with 503s rather than piling up
+    and each scrypt hash's 32 MiB working set stays bounded. The pool is
+    created on first use and again in a forked child.
+
+    By then this process runs several threads, so workers are started with
+    forkserver (spawn where that is unavailable) rather than fork, which
+    could copy a lock some other thread holds. The jobs live in
+    ``password_jobs``, which the fork server preloads so new workers start
+    with it imported. Like every non-fork start method, each worker also
+    imports the entry script as ``__mp_main__``: cheap for gunicorn's or
+    flask's launcher, but it would run all of backend again, so
+    ``python backend.py`` hashes inline instead.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.method_prefix = password_jobs.method_prefix(config["method"])
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+        self._slots = None
+
+    def hash(self, password):
+        return self._run(password_jobs.hash_password, password, self.config["method"])
+
+    def verify(self, stored_hash, password):
+        """Return (matches, upgraded hash or None)."""
+        return self._run(
+            password_jobs.verify_password, stored_hash, password, self.config["method"], self.method_prefix
+        )
+
+    def _run(self, function, *args):
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        if executor is None:
+            try:
+                return function(*args)
+            finally:
+                slots.release()
+        try:
+            future = executor.submit(function, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future.result()
+
+    def _pool(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                workers = self.config["workers"]
+                self._executor = None
+                if workers > 0:
+                    methods = multiprocessing.get_all_start_methods()
+                    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                    if context.get_start_method() == "forkserver":
+                        context.set_forkserver_preload(["password_jobs"])
+                    self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+                self._slots = threading.BoundedSemaphore(self.config["max_pending"])
+            return self._executor, self._slots
+
+
+PASSWORD_HASHER = PasswordHasher(PASSWORD_CONFIG)
+
+
+# --- Request Metrics ------------------------------------------------------
+class RequestStats:
+    """Timings and sizes gathered while this thread serves one request."""
+
+    __slots__ = (
+        "started", "db_queries", "db_seconds", "json_encode_seconds", "json_decode_seconds",
+        "role", "method", "path", "route", "collection", "status", "request_bytes",
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.json_encode_seconds = 0.0
+        self.json_decode_seconds = 0.0
+        self.role = None
+        self.method = self.path = self.route = self.collection = None
+        self.status = None
+        self.request_bytes = 0
+
+
+_metrics_local = threading.local()
+
+
+def request_stats():
+    """Stats of the request this thread is serving, or None outside one."""
+    return getattr(_metrics_local, "stats", None)
+
+
+class MetricsRegistry:
+    """Counters and histograms rendered in the Prometheus text format.
+
+    Values live in this process only: with several workers, each one
+    reports its own requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = {}
+        self._series = {}
+
+    def counter(self, name, description):
+        self._families[name] = ("counter", description, None)
+
+    def histogram(self, name, description, buckets):
+        self._families[name] = ("histogram", description, tuple(buckets))
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = self._families[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Cumulative bucket counts, then the observation count and sum.
+                series = self._series[key] = [0] * len(buckets) + [0, 0]
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            snapshot = sorted(
+                (key, list(value) if isinstance(value, list) else value)
+                for key, value in self._series.items()
+            )
+        lines = []
+        for name, (kind, description, buckets) in self._families.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (series_name, labels), value in snapshot:
+                if series_name != name:
+                    continue
+                if kind == "counter":
+                    lines.append(f"{name}{metric_labels(labels)} {value}")
+                    continue
+                for bound, count in zip(buckets, value):
+                    lines.append(f"{name}_bucket{metric_labels(labels, ('le', bucket_bound(bound)))} {count}")
+                lines.append(f"{name}_bucket{metric_labels(labels, ('le', '+Inf'))} {value[-2]}")
+                lines.append(f"{name}_count{metric_labels(labels)} {value[-2]}")
+                lines.append(f"{name}_sum{metric_labels(labels)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def bucket_bound(bound):
+    """A bucket's ``le`` label, exactly as configured (1048576, not 1.04858e+06)."""
+    bound = float(bound)
+    return str(int(bound)) if bound.is_integer() else repr(bound)
+
+
+def metric_labels(labels, *extra):
+    """Format label pairs as {key="value",...}, escaped for the text format."""
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in pairs) + "}"
+
+
+METRICS = MetricsRegistry()
+METRICS.histogram(
+    "assetflow_http_request_duration_seconds", "Time to serve a request, including streamed bodies.",
+    METRICS_DURATION_BUCKETS,
+)
+METRICS.histogram("assetflow_http_request_size_bytes", "Request body size.", METRICS_SIZE_BUCKETS)
+METRICS.histogram(
+    "assetflow_http_response_size_bytes", "Response body size as sent (after compression).", METRICS_SIZE_BUCKETS
+)
+METRICS.counter("assetflow_db_queries_total", "SQLite statements executed while serving requests.")
+METRICS.counter("assetflow_db_seconds_total", "Time spent executing and fetching SQLite statements.")
+METRICS.counter("assetflow_json_seconds_total", "Time spent encoding and decoding JSON.")
+METRICS.counter("assetflow_slow_requests_total", "Requests slower than SLOW_REQUEST_MS.")
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that charges statement and fetch time to the current request."""
+
+    def _timed(self, method, args, statements=0):
+        stats = request_stats()
+        if stats is None:
+            return method(self, *args)
+        started = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            stats.db_seconds += time.perf_counter() - started
+            stats.db_queries += statements
+
+    def execute(self, *args):
+        return self._timed(sqlite3.Cursor.execute, args, 1)
+
+    def executemany(self, *args):
+        return self._timed(sqlite3.Cursor.executemany, args, 1)
+
+    def fetchone(self):
+        return self._timed(sqlite3.Cursor.fetchone, ())
+
+    def fetchmany(self, *args):
+        return self._timed(sqlite3.Cursor.fetchmany, args)
+
+    def fetchall(self):
+        return self._timed(sqlite3.Cursor.fetchall, ())
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, including those of ``execute()``, are instrumented."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The C shortcuts build a plain cursor without going through cursor().
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+
+@app.before_request
+def start_request_metrics():
+    if METRICS_CONFIG["enabled"]:
+        _metrics_local.stats = RequestStats()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Add the Server-Timing header and record the request once its body is sent.
+
+    Registered before compress_response, so it runs after it and sees the
+    encoded body. Streamed bodies are recorded when the stream ends; event
+    streams are recorded up to their headers, since they stay open.
+    """
+    stats = request_stats()
+    if stats is None:
+        return response
+    stats.method = request.method
+    stats.path = request.path
+    stats.collection = (request.view_args or {}).get("collection_name")
+    stats.route = request.url_rule.rule if request.url_rule else "unmatched"
+    if stats.collection in COLLECTIONS:
+        stats.route = stats.route.replace("<collection_name>", stats.collection)
+    stats.status = response.status_code
+    stats.request_bytes = request.content_length or 0
+    if METRICS_CONFIG["server_timing"]:
+        response.headers["Server-Timing"] = server_timing(stats)
+    if response.is_streamed and response.content_length is None and response.mimetype != "text/event-stream":
+        response.response = measured_chunks(response.response, stats)
+    else:
+        size = response.content_length if response.is_streamed else len(response.get_data())
+        finish_request_metrics(stats, size or 0)
+    return response
+
+
+def server_timing(stats):
+    total = (time.perf_counter() - stats.started) * 1000
+    return ", ".join([
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.db_queries} queries"',
+        f"json-decode;dur={stats.json_decode_seconds * 1000:.2f}",
+        f"json-encode;dur={stats.json_encode_seconds * 1000:.2f}",
+        f"total;dur={total:.2f}",
+    ])
+
+
+def measured_chunks(chunks, stats):
+    """Pass a streamed body through, recording the request when it ends."""
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+        finish_request_metrics(stats, size)
+
+
+def finish_request_metrics(stats, response_bytes):
+    if request_stats() is stats:
+        _metrics_local.stats = None
+    elapsed = time.perf_counter() - stats.started
+    route = {"route": stats.route}
+    METRICS.observe(
+        "assetflow_http_request_duration_seconds",
+        {"method": stats.method, "route": stats.route, "status": str(stats.status)},
+        elapsed,
+    )
+    METRICS.observe("assetflow_http_request_size_bytes", route, stats.request_bytes)
+    METRICS.observe("assetflow_http_response_size_bytes", route, response_bytes)
+    METRICS.inc("assetflow_db_queries_total", route, stats.db_queries)
+    METRICS.inc("assetflow_db_seconds_total", route, stats.db_seconds)
+    METRICS.inc("assetflow_json_seconds_total", {**route, "operation": "decode"}, stats.json_decode_seconds)
+    METRICS.inc("assetflow_json_seconds_total", {**route, "operation": "encode"}, stats.json_encode_seconds)
+    if elapsed * 1000 >= METRICS_CONFIG["slow_request_ms"]:
+        METRICS.inc("assetflow_slow_requests_total", route)
+        try:
+            log_slow_request(stats, elapsed, response_bytes)
+        except Exception as exc:  # a log line must never fail the request
+            print(f"[SLOW] {stats.method} {stats.path} -> {stats.status} in {elapsed * 1000:.0f} ms ({exc!r})")
+
+
+def log_slow_request(stats, elapsed, response_bytes):
+    details = [f"route {stats.route}", f"role {stats.role or 'anonymous'}"]
+    if stats.collection in COLLECTIONS:
+        size = collection_size(stats.collection)
+        details.append(f"{'?' if size is None else size} {stats.collection}")
+    details += [
+        f"{stats.db_queries} queries in {stats.db_seconds * 1000:.0f} ms",
+        f"json {(stats.json_decode_seconds + stats.json_encode_seconds) * 1000:.0f} ms",
+        f"{stats.request_bytes} bytes in, {response_bytes} bytes out",
+    ]
+    print(f"[SLOW] {stats.method} {stats.path} -> {stats.status} in {elapsed * 1000:.0f} ms ({', '.join(details)})")
+
+
+def collection_size(collection):
+    """A collection's document count from its summary counter, or None if no connection is free.
+
+    Used when a request is already slow, so it neither scans the table nor
+    waits for the pool.
+    """
+    try:
+        conn = DB_POOL.acquire(timeout=0)
+    except sqlite3.OperationalError:
+        return None
+    try:
+        row = conn.execute(
+            "SELECT value FROM summary_counters WHERE collection = ? AND scope = '*' AND metric = 'count'",
+            (collection,),
+        ).fetchone()
+    finally:
+        DB_POOL.release(conn)
+    return int(row["value"]) if row else 0
 
 
 # --- Database Helpers -----------------------------------------------------
-def get_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+class ConnectionPool:
+    """Bounded pool of reusable SQLite connections shared by all threads.
+
+    Connections run in autocommit mode; multi-statement writes go through
+    ``db_transaction()``. The pool is rebuilt after ``fork()`` so forked
+    workers never share a connection with their parent.
+    """
+
+    def __init__(self, path, config):
+        self.path = path
+        self.config = config
+        self.size = max(int(config["pool_size"]), 0)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.config["busy_timeout_ms"] / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            factory=InstrumentedConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(self.config['busy_timeout_ms'])}")
+        conn.execute(f"PRAGMA journal_mode = {self.config['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous = {self.config['synchronous']}")
+        conn.execute(f"PRAGMA cache_size = {int(self.config['cache_size'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.config['mmap_size'])}")
+        return conn
+
+    def acquire(self, timeout=None):
+        """Check out a connection, waiting up to ``timeout`` seconds (default: the busy timeout)."""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+        if not self.size:
+            return self._connect()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        if timeout is None:
+            timeout = self.config["busy_timeout_ms"] / 1000
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a database connection")
+
+    def release(self, conn):
+        if not self.size or self._pid != os.getpid():
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close_all(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._opened = 0
+
+
+DB_POOL = ConnectionPool(DB_PATH, DB_CONFIG)
+_db_local = threading.local()
+
+
+@contextmanager
+def db_connection():
+    """Check out a pooled connection, reusing the one this thread already holds."""
+    conn = getattr(_db_local, "conn", None)
+    if conn is not None:
+        yield conn
+        return
+    conn = DB_POOL.acquire()
+    _db_local.conn = conn
+    try:
+        yield conn
+    finally:
+        _db_local.conn = None
+        DB_POOL.release(conn)
+
+
+@contextmanager
+def db_transaction():
+    """Run the enclosed statements in one write transaction (nesting joins the outer one)."""
+    with db_connection() as conn:
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        _db_local.pending_events = []
+        _db_local.commit_callbacks = []
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            _db_local.pending_events = []
+            _db_local.commit_callbacks = []
+            raise
+        conn.execute("COMMIT")
+        callbacks, _db_local.commit_callbacks = _db_local.commit_callbacks, []
+        for callback in callbacks:
+            callback()
+        events, _db_local.pending_events = _db_local.pending_events, []
+        EVENT_BROKER.publish(events)
+
+
+def after_commit(callback):
+    """Run ``callback`` once the outermost db_transaction() commits; call inside it.
+
+    Nothing runs if the transaction rolls back. Use it for process state
+    such as caches that must not change before other readers can see the
+    write.
+    """
+    _db_local.commit_callbacks.append(callback)
+
+
+def fts5_available():
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(body)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
 
 
-def init_db():
-    conn = get_connection()
+SEARCH_AVAILABLE = fts5_available()
+if not SEARCH_AVAILABLE:
+    print("[DB] SQLite was built without FTS5; /api/search is disabled.")
+
+
+# Virtual columns over hot document fields. They cost nothing to store but
+# can be indexed and queried by name instead of repeating json_extract().
+RECORD_COLUMNS = {
+    "created_date": "coalesce(json_extract(document, '$.created_date'), '')",
+    "assigned_to_email": "json_extract(document, '$.assigned_to_email')",
+    "created_by": "json_extract(document, '$.created_by')",
+    "borrower_email": "json_extract(document, '$.borrower_email')",
+    "email": "json_extract(document, '$.email')",
+    "user_email": "json_extract(document, '$.user_email')",
+}
+
+RECORD_INDEXES = {
+    "idx_records_collection": "records(collection)",
+    "idx_records_created": "records(collection, created_date DESC, id DESC)",
+    "idx_records_assigned": "records(collection, assigned_to_email, created_date DESC, id DESC)",
+    "idx_records_created_by": "records(collection, created_by, created_date DESC, id DESC)",
+    "idx_records_borrower": "records(collection, borrower_email, created_date DESC, id DESC)",
+    "idx_records_user_email": "records(collection, user_email)",
+    # Covers conditional GETs, which only need a document's version.
+    "idx_records_version": "records(collection, id, version)",
+}
+
+
+# Typed per-collection storage. Each collection gets a records_<collection>
+# table with real columns for its hot fields and the rest of the document
+# in ``extra``. Generated ``collection`` and ``document`` columns give these
+# tables the shape of ``records``, so reads only differ in the table name.
+# Columns are shared by every collection. A value that does not fit its
+# column stays in ``extra`` and leaves the column NULL, so listings sort and
+# page on TYPED_SORT_DATE rather than on created_date itself.
+COMMON_COLUMNS = {
+    "id": "TEXT PRIMARY KEY",
+    "created_date": "TEXT",
+    "modified_date": "TEXT",
+    "created_by": "TEXT",
+}
+TYPED_COLUMNS = {
+    "users": {"email": "TEXT", "role": "TEXT", "full_name": "TEXT", "department": "TEXT"},
+    "assets": {
+        "asset_id": "TEXT", "name": "TEXT", "category": "TEXT", "status": "TEXT",
+        "assigned_to_email": "TEXT", "owner_email": "TEXT", "location": "TEXT",
+        "purchase_date": "TEXT", "warranty_expiry": "TEXT",
+        "purchase_value": "NUMERIC", "current_value": "NUMERIC",
+    },
+    "loans": {
+        "asset_id": "TEXT", "borrower_email": "TEXT", "status": "TEXT",
+        "loan_date": "TEXT", "expected_return_date": "TEXT",
+    },
+    "maintenances": {
+        "asset_id": "TEXT", "borrower_email": "TEXT", "status": "TEXT", "priority": "TEXT",
+        "scheduled_date": "TEXT", "estimated_cost": "NUMERIC",
+    },
+    "procurements": {
+        "borrower_email": "TEXT", "status": "TEXT", "category": "TEXT", "urgency": "TEXT",
+        "quantity": "NUMERIC", "estimated_cost": "NUMERIC", "total_cost": "NUMERIC",
+    },
+    "properties": {
+        "property_name": "TEXT", "property_type": "TEXT", "status": "TEXT", "city": "TEXT",
+        "price": "NUMERIC", "monthly_cost": "NUMERIC",
+    },
+    "vendors": {"vendor_name": "TEXT", "category": "TEXT", "status": "TEXT", "email": "TEXT"},
+    "activities": {"user_email": "TEXT", "action": "TEXT"},
+    "notifications": {"user_email": "TEXT"},
+}
+TYPED_SORT_DATE = "coalesce(created_date, '')"
+# Index name suffix -> columns, on top of the created and version indexes
+# every typed table has. They serve visibility_filter() like RECORD_INDEXES.
+OWNED_INDEXES = {
+    "created_by": f"created_by, {TYPED_SORT_DATE} DESC, id DESC",
+    "borrower": f"borrower_email, {TYPED_SORT_DATE} DESC, id DESC",
+}
+TYPED_INDEXES = {
+    "assets": {"assigned": f"assigned_to_email, {TYPED_SORT_DATE} DESC, id DESC"},
+    "loans": OWNED_INDEXES,
+    "maintenances": OWNED_INDEXES,
+    "procurements": OWNED_INDEXES,
+    "activities": {"user_email": "user_email"},
+    "notifications": {"user_email": "user_email"},
+}
+STORAGE_MIGRATION_BATCH_SIZE = 1000
+
+
+def typed_table(collection):
+    return f"records_{collection}"
+
+
+def typed_columns(collection):
+    """Column name -> SQL definition for a collection's typed table."""
+    return {**COMMON_COLUMNS, **TYPED_COLUMNS.get(collection, {})}
+
+
+def sort_date(table):
+    """Expression listings order and page by; ``records`` already coalesces its created_date."""
+    return "created_date" if table == "records" else TYPED_SORT_DATE
+
+
+def fits_column(value, definition):
+    """Whether ``value`` can live in a typed column and come back as the same JSON.
+
+    NUMERIC columns only take integers: SQLite stores 1500.0 as 1500, and
+    its float formatting differs from Python's, so floats stay in ``extra``.
+    """
+    if definition.startswith("NUMERIC"):
+        return isinstance(value, int) and not isinstance(value, bool) and -2**63 <= value < 2**63
+    return isinstance(value, str)
+
+
+def create_typed_table(conn, collection):
+    table = typed_table(collection)
+    columns = typed_columns(collection)
+    # Tables created while created_date was NOT NULL are rebuilt under a
+    # temporary name, then swapped in before their indexes are recreated.
+    existing = {row["name"]: row["notnull"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    rebuild = bool(existing.get("created_date"))
+    target = f"{table}_rebuild" if rebuild else table
+    definitions = ",\n".join(f"{name} {definition}" for name, definition in columns.items())
+    fields = ", ".join(f"'{name}', {name}" for name in columns)
+    # json_patch('{}', ...) drops NULL columns, so values kept in extra survive.
+    # ``document`` is STORED: it is rebuilt on every write, so list reads can
+    # stream it as cheaply as from ``records``.
     conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS records (
-            id TEXT PRIMARY KEY,
-            collection TEXT NOT NULL,
-            document TEXT NOT NULL
+        f"""
+        CREATE TABLE IF NOT EXISTS {target} (
+            {definitions},
+            version INTEGER NOT NULL DEFAULT 1,
+            extra TEXT NOT NULL DEFAULT '{{}}',
+            collection TEXT GENERATED ALWAYS AS ('{collection}') VIRTUAL,
+            document TEXT GENERATED ALWAYS AS (
+                json_patch(extra, json_patch('{{}}', json_object({fields})))
+            ) STORED
         )
         """
     )
+    if rebuild:
+        copy_nullable_dates(conn, collection, table, target)
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {target} RENAME TO {table}")
+    indexes = {"created": f"{TYPED_SORT_DATE} DESC, id DESC", "version": "id, version", **TYPED_INDEXES.get(collection, {})}
+    for suffix, columns in indexes.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{suffix} ON {table}({columns})")
+    if collection == "users":
+        ensure_user_email_index(conn, table)
+
+
+def copy_nullable_dates(conn, collection, source, target):
+    """Copy a typed table whose created_date was NOT NULL into one where it is nullable.
+
+    The old layout wrote '' for dates that did not fit, while the real value
+    stayed in ``extra``; those rows get NULL so the value shows through again.
+    A '' with nothing in ``extra`` is kept, as it cannot be told from a
+    document that was stored without a created_date.
+    """
+    names = [*typed_columns(collection), "version", "extra"]
+    selected = [
+        "CASE WHEN json_type(extra, '$.created_date') IS NULL THEN created_date END"
+        if name == "created_date" else name
+        for name in names
+    ]
+    conn.execute(f"INSERT INTO {target} ({', '.join(names)}) SELECT {', '.join(selected)} FROM {source}")
+
+
+def typed_row(collection, doc_id, document):
+    """Split a document into its typed column values (in table order) followed by the ``extra`` JSON.
+
+    Values that do not fit their column (None, booleans, objects, floats,
+    numbers sent as strings...) stay in ``extra`` untouched and leave the
+    column NULL.
+    """
+    extra = dict(document)
+    extra.pop("id", None)
+    values = [doc_id]
+    for name, definition in typed_columns(collection).items():
+        if name == "id":
+            continue
+        value = extra.get(name)
+        if fits_column(value, definition):
+            values.append(extra.pop(name))
+        else:
+            values.append(None)
+    values.append(json_dumps(extra))
+    return values
+
+
+def typed_insert_sql(collection, conflict=""):
+    table = typed_table(collection)
+    names = [*typed_columns(collection), "extra", "version"]
+    placeholders = ", ".join("?" for _ in names)
+    return f"INSERT {conflict} INTO {table} ({', '.join(names)}) VALUES ({placeholders})"
+
+
+# Storage phase per collection: "records" (legacy table only), "copying"
+# (migration running: reads use records, writes go to both) or "typed".
+# Only the final phase is cached, because other workers may advance it.
+_typed_collections = set()
+
+
+def storage_phase(conn, collection):
+    if collection in _typed_collections:
+        return "typed"
+    row = conn.execute("SELECT phase FROM storage_migration WHERE collection = ?", (collection,)).fetchone()
+    phase = row["phase"] if row else "records"
+    if phase == "typed":
+        _typed_collections.add(collection)
+    return phase
+
+
+def write_tables(conn, collection):
+    """Tables a write must reach, the one reads use first; call inside the transaction."""
+    phase = storage_phase(conn, collection)
+    if phase == "typed":
+        return [typed_table(collection)]
+    if phase == "copying":
+        return ["records", typed_table(collection)]
+    return ["records"]
+
+
+def read_table(conn, collection):
+    return write_tables(conn, collection)[0]
+
+
+def store_insert(conn, collection, documents, texts):
+    """Insert documents (with ids) and their JSON ``texts`` into every table of the collection."""
+    for table in write_tables(conn, collection):
+        if table == "records":
+            conn.executemany(
+                "INSERT INTO records (id, collection, document) VALUES (?, ?, ?)",
+                [(document["id"], collection, text) for document, text in zip(documents, texts)],
+            )
+        else:
+            conn.executemany(
+                typed_insert_sql(collection),
+                [(*typed_row(collection, document["id"], document), 1) for document in documents],
+            )
+
+
+def store_delete(conn, collection, doc_id):
+    for table in write_tables(conn, collection):
+        conn.execute(f"DELETE FROM {table} WHERE id = ? AND collection = ?", (doc_id, collection))
+
+
+def json_field_path(name):
+    """JSON path of a top-level field; SQLite paths cannot escape a double quote."""
+    if '"' in name:
+        raise ValueError(f"Field names cannot contain double quotes: {name}")
+    return f'$."{name}"'
+
+
+def json_set_args(fields):
+    """Placeholders and params for json_set(target, path, value, ...) over ``fields``."""
+    placeholders = ", ".join("?, json(?)" for _ in fields)
+    params = []
+    for name, value in fields.items():
+        params.extend([json_field_path(name), json_dumps(value)])
+    return placeholders, params
+
+
+def set_fields_clause(table, collection, fields):
+    """SET clause and params that store ``fields`` ({name: value}) in ``table``'s layout."""
+    if table == "records":
+        placeholders, params = json_set_args(fields)
+        return f"document = json_set(document, {placeholders})", params
+    columns = typed_columns(collection)
+    assignments, params, extra = [], [], {}
+    for name, value in fields.items():
+        if name in columns and fits_column(value, columns[name]):
+            assignments.append(f"{name} = ?")
+            params.append(value)
+            continue
+        if name in columns:
+            assignments.append(f"{name} = NULL")  # let the value in extra show through
+        extra[name] = value
+    if extra:
+        placeholders, extra_params = json_set_args(extra)
+        assignments.append(f"extra = json_set(extra, {placeholders})")
+        params.extend(extra_params)
+    return ", ".join(assignments), params
+
+
+def db_count(collection):
+    with db_connection() as conn:
+        table = read_table(conn, collection)
+        return conn.execute(
+            f"SELECT COUNT(*) AS total FROM {table} WHERE collection = ?", (collection,)
+        ).fetchone()["total"]
+
+
+def init_storage(conn):
+    """Register each collection's storage phase; new or empty collections start typed."""
     conn.execute(
-        "CREATE INDEX IF NOT EXISTS idx_records_collection ON records(collection)"
+        """
+        CREATE TABLE IF NOT EXISTS storage_migration (
+            collection TEXT PRIMARY KEY,
+            phase TEXT NOT NULL,
+            copied_through TEXT NOT NULL DEFAULT ''
+        ) WITHOUT ROWID
+        """
     )
-    conn.commit()
-    conn.close()
+    for collection in COLLECTIONS:
+        row = conn.execute(
+            "SELECT phase FROM storage_migration WHERE collection = ?", (collection,)
+        ).fetchone()
+        if row is None:
+            legacy = conn.execute(
+                "SELECT 1 FROM records WHERE collection = ? LIMIT 1", (collection,)
+            ).fetchone()
+            phase = "records" if legacy else "typed"
+            conn.execute(
+                "INSERT INTO storage_migration (collection, phase) VALUES (?, ?)", (collection, phase)
+            )
+        else:
+            phase = row["phase"]
+        if phase != "records":
+            create_typed_table(conn, collection)
+
+
+def migrate_collection_storage(collection, batch_size=STORAGE_MIGRATION_BATCH_SIZE):
+    """Copy a collection from ``records`` into its typed table while the app keeps serving.
+
+    Writes go to both tables from the moment copying starts, so the backfill
+    only inserts rows the typed table does not have yet. Progress is saved
+    after every batch, and an interrupted run resumes where it stopped.
+    Returns the number of rows copied by this call.
+    """
+    with db_transaction() as conn:
+        if storage_phase(conn, collection) == "typed":
+            return 0
+        if collection == "users":
+            duplicates = duplicate_user_emails(conn, "records")
+            if duplicates:
+                raise ValueError(f"Duplicate user emails must be resolved first: {', '.join(duplicates)}")
+        create_typed_table(conn, collection)
+        conn.execute("UPDATE storage_migration SET phase = 'copying' WHERE collection = ?", (collection,))
+    copied = 0
+    insert = typed_insert_sql(collection, "OR IGNORE")
+    while True:
+        with db_transaction() as conn:
+            last_id = conn.execute(
+                "SELECT copied_through FROM storage_migration WHERE collection = ?", (collection,)
+            ).fetchone()["copied_through"]
+            rows = conn.execute(
+                "SELECT id, version, document FROM records WHERE collection = ? AND id > ? ORDER BY id LIMIT ?",
+                (collection, last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                conn.execute("UPDATE storage_migration SET phase = 'typed' WHERE collection = ?", (collection,))
+                return copied
+            # The stdlib parser keeps integers wider than 64 bits, which orjson reads as floats.
+            conn.executemany(
+                insert,
+                [(*typed_row(collection, row["id"], json.loads(row["document"])), row["version"]) for row in rows],
+            )
+            conn.execute(
+                "UPDATE storage_migration SET copied_through = ? WHERE collection = ?", (rows[-1]["id"], collection)
+            )
+        copied += len(rows)
+
+
+def purge_migrated_records(batch_size=STORAGE_MIGRATION_BATCH_SIZE):
+    """Delete ``records`` rows of collections that now live in typed tables."""
+    removed = 0
+    for collection in COLLECTIONS:
+        while True:
+            with db_transaction() as conn:
+                if storage_phase(conn, collection) != "typed":
+                    break
+                deleted = conn.execute(
+                    "DELETE FROM records WHERE rowid IN "
+                    "(SELECT rowid FROM records WHERE collection = ? LIMIT ?)",
+                    (collection, batch_size),
+                ).rowcount
+            removed += deleted
+            if deleted < batch_size:
+                break
+    return removed
+
+
+def init_db():
+    with db_transaction() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                id TEXT PRIMARY KEY,
+                collection TEXT NOT NULL,
+                document TEXT NOT NULL
+            )
+            """
+        )
+        existing = {row["name"] for row in conn.execute("PRAGMA table_xinfo(records)")}
+        if "version" not in existing:
+            conn.execute("ALTER TABLE records ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        for name, expression in RECORD_COLUMNS.items():
+            if name not in existing:
+                conn.execute(
+                    f"ALTER TABLE records ADD COLUMN {name} GENERATED ALWAYS AS ({expression}) VIRTUAL"
+                )
+        for name, definition in RECORD_INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+        SESSION_STORE.init_schema(conn)
+        summary_missing = not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'summary_counters'"
+        ).fetchone()
+        search_missing = SEARCH_AVAILABLE and not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+        ).fetchone()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                op TEXT NOT NULL,
+                document TEXT NOT NULL,
+                changed_at TEXT NOT NULL,
+                assigned_to_email GENERATED ALWAYS AS (json_extract(document, '$.assigned_to_email')) VIRTUAL,
+                created_by GENERATED ALWAYS AS (json_extract(document, '$.created_by')) VIRTUAL,
+                borrower_email GENERATED ALWAYS AS (json_extract(document, '$.borrower_email')) VIRTUAL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_change_log_collection ON change_log(collection, seq)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_change_log_changed_at ON change_log(changed_at)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS change_log_state (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS collection_versions (
+                collection TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+            """
+        )
+        ensure_user_email_index(conn)
+        init_storage(conn)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summary_counters (
+                collection TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                value REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (collection, scope, metric)
+            ) WITHOUT ROWID
+            """
+        )
+        if SEARCH_AVAILABLE:
+            # search_docs maps each indexed document to its FTS rowid.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS search_docs (
+                    id INTEGER PRIMARY KEY,
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL UNIQUE
+                )
+                """
+            )
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+                "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+    if summary_missing:
+        rebuild_summary_counters()
+    if search_missing:
+        rebuild_search_index()
     seed_database()
 
 
+def normalize_email(email):
+    return email.strip().lower() if isinstance(email, str) else email
+
+
+def normalize_user_emails(conn, table):
+    """Lower-case stored user emails, as every write now does; returns the rows changed."""
+    if table == "records":
+        query = (
+            "UPDATE records SET document = json_set(document, '$.email', lower(trim(email))), "
+            "version = version + 1 WHERE collection = 'users' AND email != lower(trim(email))"
+        )
+    else:
+        query = f"UPDATE {table} SET email = lower(trim(email)), version = version + 1 WHERE email != lower(trim(email))"
+    return conn.execute(query).rowcount
+
+
+def duplicate_user_emails(conn, table):
+    return [
+        row["email"]
+        for row in conn.execute(
+            f"SELECT lower(email) AS email FROM {table} WHERE collection = 'users' AND email IS NOT NULL "
+            "GROUP BY lower(email) HAVING COUNT(*) > 1"
+        )
+    ]
+
+
+def ensure_user_email_index(conn, table="records"):
+    """Index users by lower(email), unique unless existing data already has duplicates.
+
+    Stored emails are normalized first. Building the index backfills it for
+    existing rows. When duplicates are found a plain index is used so
+    lookups stay fast, and the unique one is created on the first start
+    after they have been cleaned up.
+    """
+    if normalize_user_emails(conn, table):
+        bump_collection_version(conn, "users")
+    duplicates = duplicate_user_emails(conn, table)
+    if table == "records":
+        name, target = "idx_users_email_lower", "records(lower(email)) WHERE collection = 'users'"
+        legacy = "idx_users_email"
+    else:
+        name, target = f"idx_{table}_email_lower", f"{table}(lower(email))"
+        legacy = f"idx_{table}_email"
+    # Indexes from before emails were case-insensitive.
+    conn.execute(f"DROP INDEX IF EXISTS {legacy}")
+    indexes = {row["name"]: row["unique"] for row in conn.execute(f"PRAGMA index_list({table})")}
+    want_unique = not duplicates
+    if name in indexes and bool(indexes[name]) != want_unique:
+        conn.execute(f"DROP INDEX {name}")
+    if duplicates:
+        print(f"[DB] Duplicate user emails prevent a unique email index: {', '.join(duplicates)}")
+    conn.execute(f"CREATE {'UNIQUE ' if want_unique else ''}INDEX IF NOT EXISTS {name} ON {target}")
+
+
 def seed_database():
-    conn = get_connection()
-    cursor = conn.execute("SELECT COUNT(*) AS total FROM records")
-    total = cursor.fetchone()["total"]
-    if total:
-        conn.close()
+    if any(db_count(collection) for collection in COLLECTIONS):
         return
 
     now = datetime.now()
@@ -253,95 +1845,381 @@ def seed_database():
         "notifications": [],
     }
 
-    for collection, documents in seed_data.items():
-        for doc in documents:
-            conn.execute(
-                "INSERT INTO records (id, collection, document) VALUES (?, ?, ?)",
-                (doc["id"], collection, json.dumps(doc)),
-            )
-    conn.commit()
-    conn.close()
+    with db_transaction() as conn:
+        for collection, documents in seed_data.items():
+            store_insert(conn, collection, documents, [json_dumps(doc) for doc in documents])
+    rebuild_summary_counters()
+    rebuild_search_index()
 
 
-def db_list(collection):
-    conn = get_connection()
-    rows = conn.execute(
-        "SELECT document FROM records WHERE collection = ?", (collection,)
-    ).fetchall()
-    conn.close()
-    documents = [json.loads(row["document"]) for row in rows]
-    try:
-        documents.sort(
-            key=lambda doc: doc.get("created_date", "1970-01-01T00:00:00"), reverse=True
-        )
-    except Exception:
-        pass
-    return documents
+def served_document(collection):
+    """SQL expression for a stored document as the API serves it.
 
+    Private fields are dropped by SQLite, so read routes can pass the
+    stored JSON text straight into the response without parsing it.
+    """
+    if collection == "users":
+        return "json_remove(document, '$.password_hash')"
+    return "document"
 
-def db_get(collection, doc_id):
-    conn = get_connection()
-    row = conn.execute(
-        "SELECT document FROM records WHERE collection = ? AND id = ?",
-        (collection, doc_id),
-    ).fetchone()
-    conn.close()
-    if not row:
-        return None
-    return json.loads(row["document"])
 
+def db_list(collection, where="", params=()):
+    """Return every document in a collection, newest first.
 
-def db_insert(collection, document):
-    doc_id = document.get("id") or str(uuid.uuid4())
-    document["id"] = doc_id
-    if "created_date" not in document:
-        document["created_date"] = datetime.now().isoformat()
-    conn = get_connection()
+    ``where``/``params`` is an optional extra SQL condition, typically from
+    ``visibility_filter()``.
+    """
+    query = "SELECT document FROM {table} WHERE collection = ?"
+    if where:
+        query += f" AND {where}"
+    query += " ORDER BY {sort} DESC, id DESC"
+    with db_connection() as conn:
+        table = read_table(conn, collection)
+        rows = conn.execute(query.format(table=table, sort=sort_date(table)), [collection, *params]).fetchall()
+    return [json_loads(row["document"]) for row in rows]
+
+
+def bump_collection_version(conn, collection):
+    """Advance a collection's data version; call inside the write's transaction."""
     conn.execute(
-        "INSERT INTO records (id, collection, document) VALUES (?, ?, ?)",
-        (doc_id, collection, json.dumps(document)),
+        """
+        INSERT INTO collection_versions (collection, version) VALUES (?, 1)
+        ON CONFLICT (collection) DO UPDATE SET version = version + 1
+        """,
+        (collection,),
     )
-    conn.commit()
-    conn.close()
-    return document
 
 
-def db_update(collection, doc_id, updates):
-    existing = db_get(collection, doc_id)
-    if not existing:
+def db_get_version(collection, doc_id):
+    """Return a document's version (None if missing) from the covering index alone."""
+    with db_connection() as conn:
+        table = read_table(conn, collection)
+        row = conn.execute(
+            f"SELECT version FROM {table} INDEXED BY idx_{table}_version WHERE collection = ? AND id = ?",
+            (collection, doc_id),
+        ).fetchone()
+    return row["version"] if row else None
+
+
+def get_collection_versions(collections):
+    """Return {collection: version}; collections never written to are at version 0."""
+    placeholders = ", ".join("?" for _ in collections)
+    with db_connection() as conn:
+        rows = conn.execute(
+            f"SELECT collection, version FROM collection_versions WHERE collection IN ({placeholders})",
+            list(collections),
+        ).fetchall()
+    versions = dict.fromkeys(collections, 0)
+    versions.update({row["collection"]: row["version"] for row in rows})
+    return versions
+
+
+def db_iter(collection, where="", params=(), chunk_size=CSV_EXPORT_CHUNK_SIZE, raw=False):
+    """Yield a collection newest first in lists of up to ``chunk_size`` documents.
+
+    Each chunk is a keyset page read with db_page(), whose connection goes
+    back to the pool before the chunk is yielded, so a streaming response
+    never pins a pooled connection while its client reads. Documents added
+    between chunks sort before the cursor and are not included. With
+    ``raw`` the chunks hold the served JSON text instead of parsed documents.
+    """
+    cursor = None
+    while True:
+        chunk, cursor = db_page(collection, chunk_size, cursor, where, params, raw)
+        if chunk:
+            yield chunk
+        if not cursor:
+            return
+
+
+def encode_cursor(created_date, doc_id):
+    raw = json.dumps([created_date, doc_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode an opaque page cursor, raising ValueError if it was tampered with."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_date, doc_id = json.loads(raw)
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(created_date, str) or not isinstance(doc_id, str):
+        raise ValueError("Invalid cursor")
+    return created_date, doc_id
+
+
+def db_page(collection, limit, cursor=None, where="", params=(), raw=False):
+    """Return one page of a collection, newest first, plus the cursor for the next page.
+
+    Pages are keyset-paginated on the indexed (created_date, id) pair, so each
+    page costs O(limit) regardless of how deep into the collection it is.
+    With ``raw`` the page holds the served JSON text of each document.
+    """
+    column = served_document(collection) if raw else "document"
+    query = f"SELECT id, {{sort}} AS sort_date, {column} AS document FROM {{table}} WHERE collection = ?"
+    args = [collection]
+    if where:
+        query += f" AND {where}"
+        args.extend(params)
+    if cursor:
+        query += " AND ({sort}, id) < (?, ?)"
+        args.extend(decode_cursor(cursor))
+    query += " ORDER BY {sort} DESC, id DESC LIMIT ?"
+    args.append(limit + 1)
+    with db_connection() as conn:
+        table = read_table(conn, collection)
+        rows = conn.execute(query.format(table=table, sort=sort_date(table)), args).fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["sort_date"], rows[-1]["id"])
+    if raw:
+        return [row["document"] for row in rows], next_cursor
+    return [json_loads(row["document"]) for row in rows], next_cursor
+
+
+def db_get(collection, doc_id, raw=False):
+    column = served_document(collection) if raw else "document"
+    with db_connection() as conn:
+        table = read_table(conn, collection)
+        row = conn.execute(
+            f"SELECT {column} AS document FROM {table} WHERE collection = ? AND id = ?",
+            (collection, doc_id),
+        ).fetchone()
+    if not row:
         return None
-    existing.update(updates)
-    existing["modified_date"] = datetime.now().isoformat()
-    conn = get_connection()
-    conn.execute(
-        "UPDATE records SET document = ? WHERE id = ? AND collection = ?",
-        (json.dumps(existing), doc_id, collection),
-    )
-    conn.commit()
-    conn.close()
-    return existing
+    return row["document"] if raw else json_loads(row["document"])
+
+
+def db_insert(collection, document):
+    return db_insert_many(collection, [document])[0]
+
+
+def db_insert_many(collection, documents):
+    """Insert documents with one executemany in a single transaction."""
+    now = datetime.now().isoformat()
+    for document in documents:
+        document["id"] = document.get("id") or str(uuid.uuid4())
+        document.setdefault("created_date", now)
+        if collection == "users" and "email" in document:
+            document["email"] = normalize_email(document["email"])
+    texts = [json_dumps(document) for document in documents]
+    with db_transaction() as conn:
+        store_insert(conn, collection, documents, texts)
+        apply_summary_deltas(conn, collection, [(document, 1) for document in documents])
+        search_index_documents(conn, collection, documents)
+        bump_collection_version(conn, collection)
+        log_changes(
+            conn, collection, [(document["id"], "create", text) for document, text in zip(documents, texts)]
+        )
+        if collection == "users":
+            for document in documents:
+                after_commit(partial(USER_CACHE.invalidate, email=document.get("email"), user_id=document["id"]))
+    return documents
+
+
+class VersionConflict(Exception):
+    """The document exists but is no longer at a version the caller expected."""
+
+    def __init__(self, version):
+        super().__init__(f"Document is at version {version}")
+        self.version = version
+
+
+def db_update(collection, doc_id, updates, versions=None):
+    """Set top-level fields of a document in place and return (document, version).
+
+    The fields are written by one UPDATE per table with json_set (or the
+    typed columns), so concurrent updates of different fields never
+    overwrite each other. With ``versions`` the update only applies while
+    the document is at one of them, else VersionConflict is raised. The
+    previous document is read in the same write transaction for the
+    counters, search index and change log. Returns None if it is missing.
+    """
+    with db_transaction() as conn:
+        previous = db_get(collection, doc_id)
+        if not previous:
+            return None
+        fields = {name: value for name, value in updates.items() if name != "id"}
+        if collection == "users" and "email" in fields:
+            fields["email"] = normalize_email(fields["email"])
+        fields.update(derived_updates(collection, previous, fields))
+        fields["modified_date"] = datetime.now().isoformat()
+        condition, condition_params = "id = ? AND collection = ?", [doc_id, collection]
+        if versions is not None:
+            condition += f" AND version IN ({', '.join('?' for _ in versions) or 'NULL'})"
+            condition_params.extend(versions)
+        changed = []
+        for table in write_tables(conn, collection):
+            assignments, params = set_fields_clause(table, collection, fields)
+            changed.append(conn.execute(
+                f"UPDATE {table} SET {assignments}, version = version + 1 "
+                f"WHERE {condition} RETURNING version, document",
+                [*params, *condition_params],
+            ).fetchone())
+        # The first table is the one reads use.
+        if changed[0] is None:
+            raise VersionConflict(db_get_version(collection, doc_id))
+        version, text = changed[0]["version"], changed[0]["document"]
+        existing = json_loads(text)
+        apply_summary_deltas(conn, collection, [(previous, -1), (existing, 1)])
+        search_index_documents(conn, collection, [existing])
+        bump_collection_version(conn, collection)
+        changes = [(doc_id, "update", text)]
+        if visibility_scopes(collection, previous) != visibility_scopes(collection, existing):
+            # Readers who lose sight of the document get a tombstone first.
+            changes.insert(0, (doc_id, "delete", json_dumps(previous)))
+        log_changes(conn, collection, changes)
+        if collection == "users":
+            after_commit(partial(USER_CACHE.invalidate, email=existing.get("email"), user_id=doc_id))
+    return existing, version
 
 
 def db_delete(collection, doc_id):
-    conn = get_connection()
-    conn.execute(
-        "DELETE FROM records WHERE id = ? AND collection = ?", (doc_id, collection)
+    """Delete a document, returning it (or None if it did not exist)."""
+    with db_transaction() as conn:
+        existing = db_get(collection, doc_id)
+        if not existing:
+            return None
+        store_delete(conn, collection, doc_id)
+        apply_summary_deltas(conn, collection, [(existing, -1)])
+        search_unindex_documents(conn, collection, [doc_id])
+        bump_collection_version(conn, collection)
+        log_changes(conn, collection, [(doc_id, "delete", json_dumps(existing))])
+        if collection == "users":
+            if existing.get("email"):
+                # Joins this transaction with the sqlite session store.
+                SESSION_STORE.remove_session(normalize_email(existing["email"]))
+            after_commit(partial(USER_CACHE.invalidate, user_id=doc_id))
+    return existing
+
+
+def db_mark_notifications_read(user_email, ids=None):
+    """Mark a user's unread notifications (optionally only ``ids``) as read.
+
+    Runs as one set-based UPDATE on the user's indexed notifications and
+    returns the number of documents changed. Summary counters do not depend
+    on the read flag, so no counter deltas are needed.
+    """
+    fields = {"read": True, "modified_date": datetime.now().isoformat()}
+    condition = """
+        WHERE collection = 'notifications' AND user_email = ?
+          AND NOT coalesce(json_extract(document, '$.read'), 0)
+    """
+    params = [user_email]
+    if ids is not None:
+        condition += " AND id IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps(list(ids)))
+    with db_transaction() as conn:
+        changed = []
+        for table in write_tables(conn, "notifications"):
+            assignments, values = set_fields_clause(table, "notifications", fields)
+            changed.append(conn.execute(
+                f"UPDATE {table} SET {assignments}, version = version + 1 {condition} RETURNING id, document",
+                [*values, *params],
+            ).fetchall())
+        # The first table is the one reads use; its rows feed the change log.
+        rows = changed[0]
+        if rows:
+            bump_collection_version(conn, "notifications")
+            log_changes(conn, "notifications", [(row["id"], "update", row["document"]) for row in rows])
+        return len(rows)
+
+
+def log_changes(conn, collection, changes):
+    """Append (doc_id, op, document JSON) entries to the change log inside the write's transaction.
+
+    ``op`` is "create", "update" or "delete" (entries logged before ops
+    were kept say "upsert"). Deletes keep the last document so the feed can
+    apply visibility rules to tombstones. The entries are also queued for
+    EVENT_BROKER, which receives them when the transaction commits.
+    """
+    now = datetime.now().isoformat()
+    conn.executemany(
+        "INSERT INTO change_log (collection, doc_id, op, document, changed_at) VALUES (?, ?, ?, ?, ?)",
+        [(collection, doc_id, op, document, now) for doc_id, op, document in changes],
+    )
+    # Sequence numbers of one executemany inside a write transaction are consecutive.
+    last = conn.execute("SELECT last_insert_rowid() AS seq").fetchone()["seq"]
+    first = last - len(changes) + 1
+    _db_local.pending_events.extend(
+        (first + offset, collection, op, doc_id, document)
+        for offset, (doc_id, op, document) in enumerate(changes)
     )
-    conn.commit()
-    conn.close()
+
+
+def change_log_head():
+    """Return (latest seq, seq up to which entries have been compacted away)."""
+    with db_connection() as conn:
+        head = conn.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM change_log").fetchone()["seq"]
+        state = conn.execute(
+            "SELECT value FROM change_log_state WHERE key = 'compacted_through'"
+        ).fetchone()
+    compacted = state["value"] if state else 0
+    return max(head, compacted), compacted
+
+
+def db_changes(collection, since, limit, where="", params=()):
+    """Return up to ``limit`` change entries after ``since`` that pass ``where``."""
+    query = "SELECT seq, doc_id, op, document FROM change_log WHERE collection = ? AND seq > ?"
+    args = [collection, since]
+    if where:
+        query += f" AND {where}"
+        args.extend(params)
+    query += " ORDER BY seq LIMIT ?"
+    args.append(limit + 1)
+    with db_connection() as conn:
+        rows = conn.execute(query, args).fetchall()
+    has_more = len(rows) > limit
+    changes = []
+    for row in rows[:limit]:
+        # The feed reports creates and updates alike as upserts.
+        op = "delete" if row["op"] == "delete" else "upsert"
+        change = {"seq": row["seq"], "op": op, "id": row["doc_id"]}
+        if op == "upsert":
+            document = json_loads(row["document"])
+            document.pop("password_hash", None)
+            change["document"] = document
+        changes.append(change)
+    return changes, has_more
+
+
+def compact_change_log(max_age_days=CHANGE_LOG_RETENTION_DAYS):
+    """Delete change entries older than ``max_age_days``; returns how many were removed.
+
+    Clients whose cursor falls in the removed range get 410 and must resync.
+    """
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+    with db_transaction() as conn:
+        last = conn.execute(
+            "SELECT MAX(seq) AS seq FROM change_log WHERE changed_at < ?", (cutoff,)
+        ).fetchone()["seq"]
+        if last is None:
+            return 0
+        removed = conn.execute("DELETE FROM change_log WHERE seq <= ?", (last,)).rowcount
+        conn.execute(
+            """
+            INSERT INTO change_log_state (key, value) VALUES ('compacted_through', ?)
+            ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)
+            """,
+            (last,),
+        )
+    return removed
 
 
 def get_user_by_email(email: str, include_password: bool = False):
     """Get user by email. By default, excludes password_hash for security."""
-    conn = get_connection()
-    row = conn.execute(
-        "SELECT document FROM records WHERE collection = ? AND json_extract(document, '$.email') = ?",
-        ("users", email),
-    ).fetchone()
-    conn.close()
+    # The literal collection lets SQLite use the partial idx_users_email_lower index.
+    with db_connection() as conn:
+        table = read_table(conn, "users")
+        row = conn.execute(
+            f"SELECT document FROM {table} WHERE collection = 'users' AND lower(email) = ?",
+            (normalize_email(email),),
+        ).fetchone()
     if not row:
         return None
-    user = json.loads(row["document"])
+    user = json_loads(row["document"])
     if not include_password:
         user.pop("password_hash", None)
     return user
@@ -371,7 +2249,440 @@ def ensure_user(email: str, password_hash: str = None):
     }
     if password_hash:
         user["password_hash"] = password_hash
-    return db_insert("users", user)
+    try:
+        return db_insert("users", user)
+    except sqlite3.IntegrityError:
+        # Another request created the same user first.
+        if password_hash:
+            raise
+        return get_user_by_email(email)
+
+
+# --- Session & OTP Stores -------------------------------------------------
+# Sessions are keyed by email, like the X-User-Email header that carries
+# them. Lifetimes slide: a session is extended once less than half of
+# SESSION_CONFIG["ttl_seconds"] remains, so active users stay logged in
+# without a write on every request.
+class MemorySessionStore:
+    """Sessions and OTPs in process memory; each worker process has its own."""
+
+    def __init__(self, config):
+        self.config = config
+        self._sessions = {}
+        self._otps = {}
+        self._lock = threading.Lock()
+
+    def init_schema(self, conn):
+        pass
+
+    def add_session(self, email):
+        with self._lock:
+            self._sessions[email] = time.time() + self.config["ttl_seconds"]
+
+    def check_session(self, email):
+        """Return (has a session, user version); this process sees every user write, so no version."""
+        now = time.time()
+        with self._lock:
+            expires_at = self._sessions.get(email)
+            if expires_at is None or expires_at <= now:
+                self._sessions.pop(email, None)
+                return False, None
+            if expires_at - now < self.config["ttl_seconds"] / 2:
+                self._sessions[email] = now + self.config["ttl_seconds"]
+            return True, None
+
+    def remove_session(self, email):
+        with self._lock:
+            self._sessions.pop(email, None)
+
+    def set_otp(self, email, code):
+        with self._lock:
+            self._otps[email] = {
+                "code": code,
+                "expires_at": datetime.now() + timedelta(seconds=self.config["otp_ttl_seconds"]),
+            }
+
+    def get_otp(self, email):
+        with self._lock:
+            return self._otps.get(email)
+
+    def pop_otp(self, email):
+        with self._lock:
+            self._otps.pop(email, None)
+
+
+class SqliteSessionStore:
+    """Sessions and OTPs in the application database, shared by every worker.
+
+    Lookups are primary-key reads on pooled connections (DB_POOL reopens
+    its connections after a fork). Expired rows are ignored on read and
+    deleted by whichever process next writes after the cleanup interval.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._next_cleanup = 0.0
+
+    def init_schema(self, conn):
+        for table in ("sessions", "otp_codes"):
+            code_column = "code TEXT NOT NULL," if table == "otp_codes" else ""
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    email TEXT PRIMARY KEY,
+                    {code_column}
+                    expires_at REAL NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_expires_at ON {table}(expires_at)")
+
+    def add_session(self, email):
+        self._write(
+            "INSERT INTO sessions (email, expires_at) VALUES (?, ?) "
+            "ON CONFLICT (email) DO UPDATE SET expires_at = excluded.expires_at",
+            (email, time.time() + self.config["ttl_seconds"]),
+        )
+
+    def check_session(self, email):
+        """Return (has a session, version of the user's document or None).
+
+        The version comes from the same query as the session, so USER_CACHE
+        can tell whether any worker has changed this user since it was
+        cached without another round trip.
+        """
+        now = time.time()
+        with db_connection() as conn:
+            table = read_table(conn, "users")
+            row = conn.execute(
+                f"""
+                SELECT expires_at, (
+                    SELECT version FROM {table} WHERE collection = 'users' AND lower(email) = ?1
+                ) AS user_version
+                FROM sessions WHERE email = ?1 AND expires_at > ?2
+                """,
+                (email, now),
+            ).fetchone()
+        if not row:
+            return False, None
+        if row["expires_at"] - now < self.config["ttl_seconds"] / 2:
+            self._write(
+                "UPDATE sessions SET expires_at = ? WHERE email = ?",
+                (now + self.config["ttl_seconds"], email),
+            )
+        return True, row["user_version"]
+
+    def remove_session(self, email):
+        self._write("DELETE FROM sessions WHERE email = ?", (email,))
+
+    def set_otp(self, email, code):
+        self._write(
+            "INSERT INTO otp_codes (email, code, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (email) DO UPDATE SET code = excluded.code, expires_at = excluded.expires_at",
+            (email, code, time.time() + self.config["otp_ttl_seconds"]),
+        )
+
+    def get_otp(self, email):
+        with db_connection() as conn:
+            row = conn.execute("SELECT code, expires_at FROM otp_codes WHERE email = ?", (email,)).fetchone()
+        if not row:
+            return None
+        return {"code": row["code"], "expires_at": datetime.fromtimestamp(row["expires_at"])}
+
+    def pop_otp(self, email):
+        self._write("DELETE FROM otp_codes WHERE email = ?", (email,))
+
+    def cleanup(self):
+        """Delete expired sessions and OTPs."""
+        now = time.time()
+        with db_transaction() as conn:
+            conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM otp_codes WHERE expires_at <= ?", (now,))
+        self._next_cleanup = now + self.config["cleanup_interval_seconds"]
+
+    def _write(self, query, params):
+        with db_transaction() as conn:
+            conn.execute(query, params)
+        if time.time() >= self._next_cleanup:
+            self.cleanup()
+
+
+SESSION_STORES = {"memory": MemorySessionStore, "sqlite": SqliteSessionStore}
+if SESSION_CONFIG["backend"] not in SESSION_STORES:
+    raise RuntimeError(f"Unknown SESSION_STORE: {SESSION_CONFIG['backend']}")
+SESSION_STORE = SESSION_STORES[SESSION_CONFIG["backend"]](SESSION_CONFIG)
+
+
+# --- Dashboard Summary Counters -------------------------------------------
+# Aggregates behind /api/dashboard/summary. Each document contributes to the
+# global "*" scope plus one scope per email that visibility_filter() lets see
+# it, and the write helpers apply its contribution as a delta in the same
+# transaction, so reading the summary never rescans the collections.
+OPEN_MAINTENANCE_STATUSES = {"pending", "approved", "in_progress"}
+PENDING_PROCUREMENT_STATUSES = {"pending", "manager_approved"}
+# Newest documents the dashboard lists per collection, read as one keyset page.
+DASHBOARD_RECENT = {"assets": 5, "properties": 5, "loans": 5, "activities": 6}
+
+
+def to_number(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def visibility_scopes(collection, doc):
+    """Emails (plus "*" for admins) that visibility_filter() lets see ``doc``."""
+    scopes = {"*"}
+    if collection == "assets" and doc.get("assigned_to_email"):
+        scopes.add(doc["assigned_to_email"])
+    if collection in {"loans", "maintenances", "procurements"}:
+        scopes.update(email for email in (doc.get("created_by"), doc.get("borrower_email")) if email)
+    return scopes
+
+
+def summary_metrics(collection, doc):
+    metrics = {"count": 1}
+    status = doc.get("status")
+    if collection == "assets":
+        metrics["value"] = to_number(doc.get("current_value"))
+        metrics[f"status:{status or 'unknown'}"] = 1
+        metrics[f"category:{doc.get('category') or 'other'}"] = 1
+    elif collection == "properties":
+        metrics["value"] = to_number(doc.get("price") or doc.get("monthly_cost"))
+    elif collection == "loans" and status == "active":
+        metrics["active"] = 1
+        due = str(doc.get("expected_return_date") or "")[:10]
+        if due:
+            metrics[f"due:{due}"] = 1
+    elif collection == "maintenances" and status in OPEN_MAINTENANCE_STATUSES:
+        metrics["open"] = 1
+    elif collection == "procurements" and status in PENDING_PROCUREMENT_STATUSES:
+        metrics["pending"] = 1
+    return metrics
+
+
+def apply_summary_deltas(conn, collection, changes):
+    """Apply (document, sign) contributions to the counters; sign is 1 to add, -1 to remove.
+
+    Deltas are summed in Python first so a batch of documents costs one
+    upsert per distinct counter.
+    """
+    deltas = {}
+    for doc, sign in changes:
+        metrics = summary_metrics(collection, doc)
+        for scope in visibility_scopes(collection, doc):
+            for metric, value in metrics.items():
+                key = (scope, metric)
+                deltas[key] = deltas.get(key, 0) + sign * value
+    conn.executemany(
+        """
+        INSERT INTO summary_counters (collection, scope, metric, value) VALUES (?, ?, ?, ?)
+        ON CONFLICT (collection, scope, metric) DO UPDATE SET value = value + excluded.value
+        """,
+        [(collection, scope, metric, value) for (scope, metric), value in deltas.items() if value],
+    )
+
+
+def rebuild_summary_counters():
+    """Recompute every counter from the stored documents (initial build or repair)."""
+    with db_transaction() as conn:
+        conn.execute("DELETE FROM summary_counters")
+        for collection in COLLECTIONS:
+            table = read_table(conn, collection)
+            for row in conn.execute(f"SELECT document FROM {table} WHERE collection = ?", (collection,)):
+                apply_summary_deltas(conn, collection, [(json_loads(row["document"]), 1)])
+        conn.execute("DELETE FROM summary_counters WHERE value = 0")
+
+
+def summary_scope(collection, user):
+    """The counter scope matching what visibility_filter() shows ``user``."""
+    where, _ = visibility_filter(collection, user)
+    return user["email"] if where else "*"
+
+
+def get_dashboard_summary(user):
+    scopes = [(collection, summary_scope(collection, user)) for collection in COLLECTIONS]
+    condition = " OR ".join("(collection = ? AND scope = ?)" for _ in scopes)
+    with db_connection() as conn:
+        rows = conn.execute(
+            f"SELECT collection, metric, value FROM summary_counters WHERE {condition}",
+            [value for pair in scopes for value in pair],
+        ).fetchall()
+
+    counters = {collection: {} for collection in COLLECTIONS}
+    for row in rows:
+        counters[row["collection"]][row["metric"]] = row["value"]
+
+    def grouped(metrics, prefix):
+        return {
+            key[len(prefix):]: int(value)
+            for key, value in metrics.items()
+            if key.startswith(prefix) and value
+        }
+
+    summary = {
+        collection: {"total": int(metrics.get("count", 0))}
+        for collection, metrics in counters.items()
+    }
+    assets, loans = counters["assets"], counters["loans"]
+    summary["assets"].update({
+        "total_value": round(assets.get("value", 0), 2),
+        "by_status": grouped(assets, "status:"),
+        "by_category": grouped(assets, "category:"),
+    })
+    summary["properties"]["total_value"] = round(counters["properties"].get("value", 0), 2)
+    # Matches the dashboard, which treats a loan as overdue from its due date on.
+    today = datetime.now().date().isoformat()
+    summary["loans"].update({
+        "active": int(loans.get("active", 0)),
+        "overdue": sum(int(count) for due, count in grouped(loans, "due:").items() if due <= today),
+    })
+    summary["maintenances"]["open"] = int(counters["maintenances"].get("open", 0))
+    summary["procurements"]["pending"] = int(counters["procurements"].get("pending", 0))
+    summary["recent"] = {
+        collection: db_page(collection, limit, None, *visibility_filter(collection, user))[0]
+        for collection, limit in DASHBOARD_RECENT.items()
+    }
+    return summary
+
+
+@app.cli.command("compact-changes")
+@click.option("--days", default=CHANGE_LOG_RETENTION_DAYS, show_default=True, help="Keep entries newer than this.")
+def compact_changes_command(days):
+    """Drop change log entries older than the retention window."""
+    removed = compact_change_log(days)
+    print(f"[DB] Removed {removed} change log entries older than {days} days.")
+
+
+@app.cli.command("rebuild-summary")
+def rebuild_summary_command():
+    """Recompute the dashboard summary counters from scratch."""
+    rebuild_summary_counters()
+    print("[DB] Dashboard summary counters rebuilt.")
+
+
+@app.cli.command("migrate-storage")
+@click.option(
+    "--batch-size", default=STORAGE_MIGRATION_BATCH_SIZE, show_default=True, help="Rows copied per transaction."
+)
+def migrate_storage_command(batch_size):
+    """Move collections from the records table into typed tables while the app keeps running.
+
+    Safe to interrupt and re-run: each collection resumes from its last
+    copied batch.
+    """
+    failed = []
+    for collection in COLLECTIONS:
+        try:
+            copied = migrate_collection_storage(collection, batch_size)
+        except ValueError as exc:
+            print(f"[DB] Skipped {collection}: {exc}")
+            failed.append(collection)
+            continue
+        print(f"[DB] {collection} uses typed storage ({copied} rows copied).")
+    removed = purge_migrated_records(batch_size)
+    print(f"[DB] Removed {removed} migrated rows from the records table.")
+    if failed:
+        raise click.ClickException(f"Not migrated: {', '.join(failed)}")
+
+
+# --- Full-Text Search -----------------------------------------------------
+# An FTS5 index over SEARCH_FIELDS, maintained by the write helpers in the
+# same transaction as the document itself.
+SEARCH_TERM_PATTERN = re.compile(r"\w+")
+
+
+def search_text(document, fields):
+    return " ".join(str(document[field]) for field in fields if document.get(field) not in (None, ""))
+
+
+def search_index_documents(conn, collection, documents):
+    """Add or refresh ``documents`` in the search index."""
+    if not SEARCH_AVAILABLE or collection not in SEARCH_FIELDS:
+        return
+    title_fields, body_fields = SEARCH_FIELDS[collection]
+    entries = []
+    for document in documents:
+        entry_id = conn.execute(
+            "INSERT INTO search_docs (collection, doc_id) VALUES (?, ?) "
+            "ON CONFLICT(doc_id) DO UPDATE SET collection = excluded.collection RETURNING id",
+            (collection, document["id"]),
+        ).fetchone()["id"]
+        entries.append((entry_id, search_text(document, title_fields), search_text(document, body_fields)))
+    conn.executemany("DELETE FROM search_index WHERE rowid = ?", [(entry[0],) for entry in entries])
+    conn.executemany("INSERT INTO search_index (rowid, title, body) VALUES (?, ?, ?)", entries)
+
+
+def search_unindex_documents(conn, collection, doc_ids):
+    if not SEARCH_AVAILABLE or collection not in SEARCH_FIELDS:
+        return
+    for doc_id in doc_ids:
+        row = conn.execute("DELETE FROM search_docs WHERE doc_id = ? RETURNING id", (doc_id,)).fetchone()
+        if row:
+            conn.execute("DELETE FROM search_index WHERE rowid = ?", (row["id"],))
+
+
+def rebuild_search_index():
+    """Reindex every searchable document (initial build or repair)."""
+    if not SEARCH_AVAILABLE:
+        return
+    with db_transaction() as conn:
+        conn.execute("DELETE FROM search_docs")
+        conn.execute("DELETE FROM search_index")
+        for collection in SEARCH_FIELDS:
+            table = read_table(conn, collection)
+            for row in conn.execute(f"SELECT document FROM {table} WHERE collection = ?", (collection,)):
+                search_index_documents(conn, collection, [json_loads(row["document"])])
+        conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+
+
+def search_match_expression(query):
+    """Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted, so FTS5 operators and punctuation in the input are
+    treated as plain text.
+    """
+    return " ".join(f'"{term}"*' for term in SEARCH_TERM_PATTERN.findall(query))
+
+
+def search_documents(query, collections, user, limit):
+    """Best-ranked documents matching ``query`` that ``user`` may see."""
+    expression = search_match_expression(query)
+    with db_connection() as conn:
+        # One branch per collection, since each may live in its own table.
+        branches, params = [], []
+        for collection in collections:
+            where, where_params = visibility_filter(collection, user)
+            table = read_table(conn, collection)
+            branches.append(
+                f"""
+                SELECT d.collection AS collection, t.document AS document,
+                       bm25(search_index, 10.0, 1.0) AS rank
+                FROM search_index
+                JOIN search_docs d ON d.id = search_index.rowid
+                JOIN {table} t ON t.id = d.doc_id
+                WHERE search_index MATCH ? AND d.collection = ?{f" AND {where}" if where else ""}
+                """
+            )
+            params.extend([expression, collection, *where_params])
+        params.append(limit)
+        rows = conn.execute(
+            f"SELECT * FROM ({' UNION ALL '.join(branches)}) ORDER BY rank LIMIT ?", params
+        ).fetchall()
+    return [
+        {"collection": row["collection"], "rank": row["rank"], "document": json_loads(row["document"])}
+        for row in rows
+    ]
+
+
+@app.cli.command("rebuild-search")
+def rebuild_search_command():
+    """Rebuild the full-text search index from the stored documents."""
+    if not SEARCH_AVAILABLE:
+        raise click.ClickException("SQLite was built without FTS5.")
+    rebuild_search_index()
+    print("[DB] Search index rebuilt.")
 
 
 # Initialize database on import
@@ -386,11 +2697,16 @@ def generate_otp() -> str:
 
 
 def send_otp_email(email: str, code: str) -> None:
+    """Queue the OTP email on MAIL_DISPATCHER; returns without waiting for SMTP.
+
+    SMTP_USER may be left empty for a relay that needs no login (e.g. a
+    local test server).
+    """
     missing = [key for key in ("host", "port") if not SMTP_CONFIG.get(key)]
     if not SMTP_CONFIG["from_email"]:
         missing.append("from_email")
 
-    if missing or not SMTP_CONFIG["user"] or not SMTP_CONFIG["password"]:
+    if missing or (SMTP_CONFIG["user"] and not SMTP_CONFIG["password"]):
         print(
             f"[AUTH] OTP for {email}: {code} (valid 5 minutes) -- SMTP not configured, falling back to console log."
         )
@@ -405,17 +2721,53 @@ def send_otp_email(email: str, code: str) -> None:
         "This code expires in 5 minutes.\n\nIf you did not request this, you can ignore this email.\n\nThanks,\nAssetFlow"
     )
 
-    try:
-        with smtplib.SMTP(SMTP_CONFIG["host"], SMTP_CONFIG["port"]) as server:
-            if SMTP_CONFIG["use_tls"]:
-                server.starttls()
-            server.login(SMTP_CONFIG["user"], SMTP_CONFIG["password"])
-            server.send_message(msg)
-        print(f"[AUTH] OTP email sent to {email}")
-    except Exception as exc:
+    def log_code(exc):
         print(f"[AUTH] Failed to send OTP email to {email}: {exc}")
         print(f"[AUTH] OTP for {email}: {code} (valid 5 minutes)")
 
+    if not MAIL_DISPATCHER.send(msg, on_failure=log_code):
+        log_code("mail queue is full")
+
+
+def prepare_create(collection_name, payload, user):
+    """Build a new document from a client payload, applying server-side fields."""
+    metadata = create_metadata(user["email"])
+
+    if collection_name in {"maintenances", "procurements"}:
+        payload["created_by"] = user["email"]
+
+    if collection_name == "users":
+        payload.setdefault("full_name", user["full_name"])
+        payload.setdefault("role", user["role"])
+
+    if collection_name == "notifications":
+        payload.setdefault("user_email", user["email"])
+        payload["read"] = False
+
+    if collection_name == "procurements":
+        quantity = int(payload.get("quantity", 1) or 1)
+        cost = float(payload.get("estimated_cost", 0) or 0)
+        payload["total_cost"] = quantity * cost
+
+    return {**payload, **metadata}
+
+
+def prepare_update(payload):
+    """Strip the fields a client may not change."""
+    payload.pop("id", None)
+    payload.pop("created_date", None)
+    payload.pop("created_by", None)
+    return payload
+
+
+def derived_updates(collection, previous, updates):
+    """Fields to write alongside ``updates`` that depend on the stored document."""
+    if collection == "procurements" and ("quantity" in updates or "estimated_cost" in updates):
+        quantity = int(updates.get("quantity", previous.get("quantity", 1)) or 1)
+        cost = float(updates.get("estimated_cost", previous.get("estimated_cost", 0)) or 0)
+        return {"total_cost": quantity * cost}
+    return {}
+
 
 def create_metadata(user_email):
     return {
@@ -426,10 +2778,28 @@ def create_metadata(user_email):
 
 
 def get_user_from_request_header(req):
-    user_email = (req.headers.get("X-User-Email") or "").strip().lower()
-    if not user_email or user_email not in SESSIONS:
+    return get_session_user(req.headers.get("X-User-Email"))
+
+
+def get_session_user(user_email):
+    """The logged-in user for ``user_email``, or None without a session."""
+    user_email = (user_email or "").strip().lower()
+    if not user_email:
+        return None
+    # One query checks the session and reads the user's document version.
+    active, version = SESSION_STORE.check_session(user_email)
+    if not active:
         return None
-    return get_user_by_email(user_email)
+    user = USER_CACHE.get(user_email, version)
+    if user is None:
+        generation = USER_CACHE.generation
+        user = get_user_by_email(user_email)
+        if user:
+            USER_CACHE.put(user_email, user, generation, version)
+    stats = request_stats()
+    if stats and user:
+        stats.role = user.get("role")
+    return user
 
 
 def validate_collection(collection_name):
@@ -438,28 +2808,287 @@ def validate_collection(collection_name):
     return True
 
 
+def visibility_filter(collection_name, user):
+    """Return the SQL condition and params restricting a collection to what ``user`` may see.
+
+    Non-admins only see assets assigned to them; standard users only see the
+    loans, maintenances and procurements they created or borrowed. Every
+    condition is served by an index on the matching generated column.
+    """
+    email = user["email"]
+    if collection_name == "assets" and user["role"] != "admin":
+        return "assigned_to_email = ?", (email,)
+    if collection_name in {"loans", "maintenances", "procurements"} and user["role"] == "user":
+        return "(created_by = ? OR borrower_email = ?)", (email, email)
+    return "", ()
+
+
+def list_etag(collection_name, user, args):
+    """Strong ETag for a listing: the collection version plus everything that shapes the response."""
+    version = get_collection_versions([collection_name])[collection_name]
+    where, params = visibility_filter(collection_name, user)
+    shape = json.dumps([where, list(params), sorted(args.items(multi=True))])
+    digest = hashlib.sha256(shape.encode()).hexdigest()[:16]
+    return f"{collection_name}-{version}-{digest}"
+
+
+def document_etag(collection_name, doc_id, version):
+    return f"{collection_name}-{doc_id}-{version}"
+
+
+def if_match_versions(collection_name, doc_id):
+    """Versions named by the request's If-Match tags, or None without the header (or with "*").
+
+    Tags of compressed representations name the same version as the plain one.
+    """
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    prefix = f"{collection_name}-{doc_id}-"
+    versions = set()
+    for tag in if_match.as_set():
+        version = tag[len(prefix):].split("-")[0] if tag.startswith(prefix) else ""
+        if version.isdigit():
+            versions.add(int(version))
+    return versions
+
+
+def conditional_response(etag, build):
+    """Answer 304 if the client holds ``etag``, else the (response, status) from ``build()``.
+
+    The client may hold a compressed representation, whose ETag carries the
+    content coding as a suffix (see compress_response()).
+    """
+    held = next((tag for tag in representation_etags(etag) if request.if_none_match.contains(tag)), None)
+    if held:
+        response = Response(status=304)
+        response.set_etag(held)
+    else:
+        response, status = build()
+        if status != 200:
+            return response, status
+        response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def can_see(collection_name, document, user):
+    """Python twin of visibility_filter() for a single document."""
+    where, _ = visibility_filter(collection_name, user)
+    return not where or user["email"] in visibility_scopes(collection_name, document)
+
+
+def json_text_response(body, status=200):
+    """Response for JSON text (or an iterable of text chunks) that is already encoded."""
+    return Response(body, status=status, mimetype="application/json")
+
+
+def json_array_chunks(chunks):
+    """Join chunks of JSON texts from db_iter(raw=True) into one streamed JSON array."""
+    yield "["
+    separator = ""
+    for chunk in chunks:
+        yield separator + ",".join(chunk)
+        separator = ","
+    yield "]"
+
+
+def parse_page_args(args):
+    """Read ``limit``/``cursor`` query args, raising ValueError on bad input."""
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError as exc:
+        raise ValueError("limit must be an integer") from exc
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    cursor = args.get("cursor") or None
+    if cursor:
+        decode_cursor(cursor)
+    return min(limit, MAX_PAGE_SIZE), cursor
+
+
+def is_truthy(value):
+    return (value or "").strip().lower() in {"1", "true", "yes"}
+
+
+# --- Response Compression -------------------------------------------------
+def content_codings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def representation_etags(etag):
+    """An entity tag plus the tags of its compressed representations."""
+    return [etag, *(f"{etag}-{coding}" for coding in content_codings())]
+
+
+def negotiate_coding(offered):
+    """The client's preferred coding among ``offered`` (br wins ties), or None."""
+    accepted = request.accept_encodings
+    best = max(offered, key=accepted.quality, default=None)
+    if best is None or accepted.quality(best) <= 0:
+        return None
+    return best
+
+
+def compress_body(data, coding, static=False):
+    if coding == "br":
+        key = "static_brotli_quality" if static else "brotli_quality"
+        return brotli.compress(data, quality=COMPRESSION_CONFIG[key])
+    key = "static_gzip_level" if static else "gzip_level"
+    return gzip.compress(data, compresslevel=COMPRESSION_CONFIG[key])
+
+
+def compress_chunks(chunks, coding):
+    """Compress a streamed body chunk by chunk, closing the source when done."""
+    if coding == "br":
+        compressor = brotli.Compressor(quality=COMPRESSION_CONFIG["brotli_quality"])
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(COMPRESSION_CONFIG["gzip_level"], zlib.DEFLATED, 31)
+        compress, finish = compressor.compress, compressor.flush
+    try:
+        for chunk in chunks:
+            data = compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+@app.after_request
+def compress_response(response):
+    """gzip/brotli-encode compressible API responses the client accepts.
+
+    File responses (send_file) and already-encoded bodies are left alone;
+    streamed bodies such as CSV exports are compressed as they stream,
+    except event streams, which must reach the client unbuffered.
+    """
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    size = None if response.is_streamed else len(response.get_data())
+    if size is not None and size < COMPRESSION_CONFIG["min_size"]:
+        return response
+    response.vary.add("Accept-Encoding")
+    coding = negotiate_coding(content_codings())
+    if coding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_chunks(response.response, coding)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = compress_body(response.get_data(), coding)
+        if len(body) >= size:
+            return response
+        response.set_data(body)
+    response.headers["Content-Encoding"] = coding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{coding}")
+    return response
+
+
 # --- Frontend Serving -----------------------------------------------------
+def static_file_entry(path):
+    """Serving metadata for one static file, with its compressed bodies prebuilt."""
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    entry = {"path": path, "mimetype": mimetype, "etag": None, "encoded": {}}
+    if mimetype in COMPRESSIBLE_MIMETYPES:
+        with open(path, "rb") as handle:
+            data = handle.read()
+        if len(data) >= COMPRESSION_CONFIG["min_size"]:
+            entry["etag"] = hashlib.sha256(data).hexdigest()[:32]
+            for coding in content_codings():
+                body = compress_body(data, coding, static=True)
+                if len(body) < len(data):
+                    entry["encoded"][coding] = body
+    return entry
+
+
+def load_static_files(directory):
+    """Map each file under ``directory`` (by URL path) to its static_file_entry()."""
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            files[os.path.relpath(path, directory).replace(os.sep, "/")] = static_file_entry(path)
+    return files
+
+
+# Read once at startup so routing a request never touches the filesystem;
+# restart the server after rebuilding the frontend.
+FRONTEND_FILES = load_static_files(FRONTEND_DIST_DIR)
+LEGACY_FRONTEND_FILE = static_file_entry(LEGACY_FRONTEND) if os.path.isfile(LEGACY_FRONTEND) else None
+
+
+def send_static(entry, cache_control):
+    coding = negotiate_coding(list(entry["encoded"]))
+    if coding:
+        response = Response(entry["encoded"][coding], mimetype=entry["mimetype"])
+        response.headers["Content-Encoding"] = coding
+        response.set_etag(f"{entry['etag']}-{coding}")
+        response.make_conditional(request)
+    else:
+        response = send_file(entry["path"], mimetype=entry["mimetype"])
+    if entry["encoded"]:
+        response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
 @app.route("/", defaults={"path": ""})
 @app.route("/<path:path>")
 def serve_frontend(path):
     if path.startswith("api/"):
         return jsonify({"error": "API endpoint not found"}), 404
 
-    if os.path.exists(FRONTEND_DIST_DIR):
-        full_path = os.path.join(FRONTEND_DIST_DIR, path)
-        if path and os.path.isfile(full_path):
-            return send_from_directory(FRONTEND_DIST_DIR, path)
-        return send_from_directory(FRONTEND_DIST_DIR, FRONTEND_ENTRY)
+    if FRONTEND_ENTRY in FRONTEND_FILES:
+        entry = FRONTEND_FILES.get(path)
+        if entry and path != FRONTEND_ENTRY:
+            immutable = HASHED_ASSET_PATTERN.match(path)
+            return send_static(entry, IMMUTABLE_CACHE_CONTROL if immutable else "no-cache")
+        return send_static(FRONTEND_FILES[FRONTEND_ENTRY], "no-cache")
 
-    if os.path.exists(LEGACY_FRONTEND):
-        return send_from_directory(BASE_DIR, "appupdate.html")
+    if LEGACY_FRONTEND_FILE:
+        return send_static(LEGACY_FRONTEND_FILE, "no-cache")
 
     return jsonify({"error": "Frontend build not found"}), 404
 
 
+@app.errorhandler(sqlite3.IntegrityError)
+def handle_integrity_error(exc):
+    return jsonify({"error": "Document conflicts with an existing record"}), 409
+
+
+@app.errorhandler(PasswordHasherBusy)
+def handle_password_hasher_busy(exc):
+    return jsonify({"error": "Too many sign-ins in progress, please retry"}), 503, {"Retry-After": "1"}
+
+
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "Asset Management API is Running", "collections": COLLECTIONS}), 200
+    return jsonify({
+        "status": "Asset Management API is Running",
+        "collections": COLLECTIONS,
+        "user_cache": USER_CACHE.stats(),
+    }), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    if not METRICS_CONFIG["enabled"]:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    token = METRICS_CONFIG["token"]
+    if token and request.headers.get("Authorization", "") != f"Bearer {token}":
+        return jsonify({"error": "Unauthorized"}), 401
+    return Response(METRICS.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # --- API: Auth & Users ----------------------------------------------------
@@ -480,7 +3109,7 @@ def request_otp():
 
     ensure_user(email)
     code = generate_otp()
-    OTP_STORE[email] = {"code": code, "expires_at": datetime.now() + timedelta(minutes=5)}
+    SESSION_STORE.set_otp(email, code)
     send_otp_email(email, code)
     return jsonify({"message": "OTP sent"}), 200
 
@@ -490,7 +3119,7 @@ def verify_otp():
     data = request.get_json(silent=True) or {}
     email = data.get("email", "").strip().lower()
     code = data.get("code", "").strip()
-    record = OTP_STORE.get(email)
+    record = SESSION_STORE.get_otp(email)
 
     print(f"[AUTH] Verify attempt for {email}: code={code}, stored={record['code'] if record else 'None'}")
     
@@ -507,8 +3136,8 @@ def verify_otp():
         return jsonify({"error": "Invalid or expired OTP"}), 400
 
     user = ensure_user(email)
-    SESSIONS.add(email)
-    OTP_STORE.pop(email, None)
+    SESSION_STORE.add_session(email)
+    SESSION_STORE.pop_otp(email)
     print(f"[AUTH] Successfully authenticated {email}")
     return jsonify({"message": "Authenticated", "user": user}), 200
 
@@ -530,8 +3159,11 @@ def signup():
     if existing:
         return jsonify({"error": "User with this email already exists"}), 400
     
-    password_hash = generate_password_hash(password)
-    user = ensure_user(email, password_hash)
+    password_hash = PASSWORD_HASHER.hash(password)
+    try:
+        user = ensure_user(email, password_hash)
+    except sqlite3.IntegrityError:
+        return jsonify({"error": "User with this email already exists"}), 400
     
     if full_name:
         user["full_name"] = full_name
@@ -541,7 +3173,7 @@ def signup():
         # Remove password_hash from response
         user.pop("password_hash", None)
     
-    SESSIONS.add(email)
+    SESSION_STORE.add_session(email)
     print(f"[AUTH] New user signed up: {email}")
     return jsonify({"message": "Account created successfully", "user": user}), 201
 
@@ -563,11 +3195,15 @@ def login():
     if not password_hash:
         return jsonify({"error": "Password not set. Please use OTP login or reset password"}), 401
     
-    if not check_password_hash(password_hash, password):
+    matches, upgraded_hash = PASSWORD_HASHER.verify(password_hash, password)
+    if not matches:
         print(f"[AUTH] Failed password attempt for {email}")
         return jsonify({"error": "Invalid email or password"}), 401
-    
-    SESSIONS.add(email)
+    if upgraded_hash:
+        # Rehash with the current PASSWORD_HASH_METHOD parameters.
+        db_update("users", user["id"], {"password_hash": upgraded_hash})
+
+    SESSION_STORE.add_session(email)
     print(f"[AUTH] Successfully authenticated {email} via password")
     # Remove password_hash before returning user
     user.pop("password_hash", None)
@@ -578,8 +3214,8 @@ def login():
 def logout():
     data = request.get_json(silent=True) or {}
     email = data.get("email", "").strip().lower()
-    if email in SESSIONS:
-        SESSIONS.remove(email)
+    SESSION_STORE.remove_session(email)
+    USER_CACHE.invalidate(email=email)
     return jsonify({"message": "Logged out"}), 200
 
 
@@ -593,19 +3229,66 @@ def list_documents(collection_name):
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
-    docs = db_list(collection_name)
-
-    if collection_name == "assets" and user["role"] != "admin":
-        docs = [doc for doc in docs if doc.get("assigned_to_email") == user["email"]]
+    def build():
+        # ?all=true keeps the legacy unbounded array response; otherwise the
+        # collection is served one keyset page at a time. Either way the
+        # stored document text is passed through without being parsed.
+        unbounded = is_truthy(request.args.get("all"))
+        where, params = visibility_filter(collection_name, user)
+        if unbounded:
+            chunks = db_iter(collection_name, where, params, raw=True)
+            return json_text_response(json_array_chunks(chunks)), 200
+        try:
+            limit, cursor = parse_page_args(request.args)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        docs, next_cursor = db_page(collection_name, limit, cursor, where, params, raw=True)
+        body = f'{{"items":[{",".join(docs)}],"next_cursor":{json_dumps(next_cursor)}}}'
+        return json_text_response(body), 200
+
+    return conditional_response(list_etag(collection_name, user, request.args), build)
+
+
+@app.route("/api/<collection_name>/changes", methods=["GET"])
+def list_changes(collection_name):
+    """Delta-sync feed: documents created, updated or deleted after ``since``.
+
+    Without ``since`` only the current ``next_since`` is returned; clients
+    read it before doing a full listing and then poll from there. A 410
+    means the entries after ``since`` were compacted and a full resync is
+    needed.
+    """
+    if not validate_collection(collection_name):
+        return jsonify({"error": "Collection not found"}), 404
 
-    if collection_name in {"loans", "maintenances", "procurements"} and user["role"] == "user":
-        docs = [
-            doc
-            for doc in docs
-            if doc.get("created_by") == user["email"] or doc.get("borrower_email") == user["email"]
-        ]
+    user = get_user_from_request_header(request)
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
 
-    return jsonify(docs), 200
+    try:
+        since = int(request.args["since"]) if "since" in request.args else None
+        limit = int(request.args.get("limit", CHANGES_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "since and limit must be integers"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+    limit = min(limit, CHANGES_MAX_LIMIT)
+
+    head, compacted = change_log_head()
+    if since is None:
+        return jsonify({"changes": [], "next_since": head, "has_more": False}), 200
+    if since < compacted:
+        return jsonify({"error": "Changes since this point were compacted; resync required"}), 410
+
+    changes, has_more = db_changes(
+        collection_name, since, limit, *visibility_filter(collection_name, user)
+    )
+    # Entries hidden by the visibility filter still advance the cursor. Ones
+    # committed after ``head`` was read can be returned too, so the cursor
+    # never falls behind the last of them.
+    last_seq = changes[-1]["seq"] if changes else since
+    next_since = last_seq if has_more else max(head, last_seq)
+    return jsonify({"changes": changes, "next_since": next_since, "has_more": has_more}), 200
 
 
 @app.route("/api/<collection_name>/<doc_id>", methods=["GET"])
@@ -617,11 +3300,17 @@ def get_document(collection_name, doc_id):
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
-    document = db_get(collection_name, doc_id)
-    if not document:
+    version = db_get_version(collection_name, doc_id)
+    if version is None:
         return jsonify({"error": f"{collection_name[:-1].capitalize()} not found"}), 404
 
-    return jsonify(document), 200
+    def build():
+        document = db_get(collection_name, doc_id, raw=True)
+        if not document:
+            return jsonify({"error": f"{collection_name[:-1].capitalize()} not found"}), 404
+        return json_text_response(document), 200
+
+    return conditional_response(document_etag(collection_name, doc_id, version), build)
 
 
 @app.route("/api/<collection_name>", methods=["POST"])
@@ -637,25 +3326,7 @@ def create_document(collection_name):
     if payload is None:
         return jsonify({"error": "Invalid JSON payload"}), 400
 
-    metadata = create_metadata(user["email"])
-
-    if collection_name in {"maintenances", "procurements"}:
-        payload["created_by"] = user["email"]
-
-    if collection_name == "users":
-        payload.setdefault("full_name", user["full_name"])
-        payload.setdefault("role", user["role"])
-
-    if collection_name == "notifications":
-        payload.setdefault("user_email", user["email"])
-        payload["read"] = False
-
-    if collection_name == "procurements":
-        quantity = int(payload.get("quantity", 1) or 1)
-        cost = float(payload.get("estimated_cost", 0) or 0)
-        payload["total_cost"] = quantity * cost
-
-    document = db_insert(collection_name, {**payload, **metadata})
+    document = db_insert(collection_name, prepare_create(collection_name, payload, user))
     return jsonify(document), 201
 
 
@@ -672,24 +3343,22 @@ def update_document(collection_name, doc_id):
     if payload is None:
         return jsonify({"error": "Invalid JSON payload"}), 400
 
-    payload.pop("id", None)
-    payload.pop("created_date", None)
-    payload.pop("created_by", None)
-
-    if collection_name == "procurements" and (
-        "quantity" in payload or "estimated_cost" in payload
-    ):
-        existing = db_get(collection_name, doc_id)
-        if not existing:
-            return jsonify({"error": "Procurement not found"}), 404
-        quantity = int(payload.get("quantity", existing.get("quantity", 1)) or 1)
-        cost = float(payload.get("estimated_cost", existing.get("estimated_cost", 0)) or 0)
-        payload["total_cost"] = quantity * cost
-
-    document = db_update(collection_name, doc_id, payload)
-    if not document:
+    try:
+        updated = db_update(
+            collection_name, doc_id, prepare_update(payload), if_match_versions(collection_name, doc_id)
+        )
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except VersionConflict as exc:
+        response = jsonify({"error": "The document was changed by someone else; reload it and try again"})
+        response.set_etag(document_etag(collection_name, doc_id, exc.version))
+        return response, 412
+    if not updated:
         return jsonify({"error": f"{collection_name[:-1].capitalize()} not found"}), 404
-    return jsonify(document), 200
+    document, version = updated
+    response = jsonify(document)
+    response.set_etag(document_etag(collection_name, doc_id, version))
+    return response, 200
 
 
 @app.route("/api/<collection_name>/<doc_id>", methods=["DELETE"])
@@ -701,42 +3370,442 @@ def delete_document(collection_name, doc_id):
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
-    document = db_get(collection_name, doc_id)
-    if not document:
+    if not db_delete(collection_name, doc_id):
         return jsonify({"error": f"{collection_name[:-1].capitalize()} not found"}), 404
-
-    db_delete(collection_name, doc_id)
     return "", 204
 
 
+class BulkAborted(Exception):
+    """Raised inside an all-or-nothing bulk transaction to roll it back."""
+
+
+def parse_bulk_operation(operation):
+    """Validate one bulk operation, returning (op, doc_id, payload)."""
+    if not isinstance(operation, dict):
+        raise ValueError("Operation must be an object")
+    op = operation.get("op")
+    doc_id = operation.get("id")
+    payload = operation.get("document")
+    if op not in {"create", "update", "delete"}:
+        raise ValueError("op must be one of create, update, delete")
+    if op != "create" and not isinstance(doc_id, str):
+        raise ValueError(f"{op} requires a string id")
+    if op != "delete" and not isinstance(payload, dict):
+        raise ValueError(f"{op} requires a document object")
+    return op, doc_id, dict(payload or {})
+
+
+def apply_bulk_operation(collection_name, op, doc_id, payload, user):
+    """Run one create/update/delete and return its per-item result."""
+    label = f"{collection_name[:-1].capitalize()} not found"
+    try:
+        if op == "create":
+            document = db_insert(collection_name, prepare_create(collection_name, payload, user))
+            return {"status": 201, "id": document["id"], "document": document}
+        if op == "update":
+            updated = db_update(collection_name, doc_id, prepare_update(payload))
+            if not updated:
+                return {"status": 404, "id": doc_id, "error": label}
+            return {"status": 200, "id": doc_id, "document": updated[0]}
+        if not db_delete(collection_name, doc_id):
+            return {"status": 404, "id": doc_id, "error": label}
+        return {"status": 204, "id": doc_id}
+    except (TypeError, ValueError) as exc:
+        return {"status": 400, "id": doc_id, "error": str(exc)}
+    except sqlite3.IntegrityError:
+        return {"status": 409, "id": doc_id, "error": "Document conflicts with an existing record"}
+
+
+def run_bulk_atomic(collection_name, parsed, user, results):
+    """Apply every operation in one transaction, batching runs of creates."""
+    pending = []
+
+    def flush_creates():
+        if not pending:
+            return
+        try:
+            documents = db_insert_many(collection_name, [document for _, document in pending])
+        except sqlite3.IntegrityError as exc:
+            for index, _ in pending:
+                results[index] = {"index": index, "op": "create", "status": 409,
+                                  "error": "Document conflicts with an existing record"}
+            raise BulkAborted() from exc
+        for (index, _), document in zip(pending, documents):
+            results[index] = {"index": index, "op": "create", "status": 201,
+                              "id": document["id"], "document": document}
+        pending.clear()
+
+    with db_transaction():
+        for index, (op, doc_id, payload) in enumerate(parsed):
+            if op == "create":
+                try:
+                    pending.append((index, prepare_create(collection_name, payload, user)))
+                except (TypeError, ValueError) as exc:
+                    results[index] = {"index": index, "op": op, "status": 400, "error": str(exc)}
+                    raise BulkAborted()
+                continue
+            flush_creates()
+            result = apply_bulk_operation(collection_name, op, doc_id, payload, user)
+            results[index] = {"index": index, "op": op, **result}
+            if result["status"] >= 400:
+                raise BulkAborted()
+        flush_creates()
+
+
+def run_bulk_best_effort(collection_name, parsed, user, results):
+    """Apply each operation under its own savepoint inside one transaction."""
+    with db_transaction() as conn:
+        for index, item in enumerate(parsed):
+            if results[index]:
+                continue
+            op, doc_id, payload = item
+            conn.execute("SAVEPOINT bulk_item")
+            events_mark = len(_db_local.pending_events)
+            result = apply_bulk_operation(collection_name, op, doc_id, payload, user)
+            if result["status"] >= 400:
+                conn.execute("ROLLBACK TO bulk_item")
+                del _db_local.pending_events[events_mark:]
+            conn.execute("RELEASE bulk_item")
+            results[index] = {"index": index, "op": op, **result}
+
+
+@app.route("/api/<collection_name>/bulk", methods=["POST"])
+def bulk_documents(collection_name):
+    """Apply a batch of create/update/delete operations in one transaction.
+
+    Body: ``{"mode": "atomic" | "best_effort", "operations": [...]}`` where each
+    operation is ``{"op": "create", "document": {...}}``,
+    ``{"op": "update", "id": ..., "document": {...}}`` or
+    ``{"op": "delete", "id": ...}``. Atomic mode (the default) commits
+    nothing if any operation fails.
+    """
+    if not validate_collection(collection_name):
+        return jsonify({"error": "Collection not found"}), 404
+
+    user = get_user_from_request_header(request)
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    body = request.get_json(silent=True)
+    if isinstance(body, list):
+        body = {"operations": body}
+    if not isinstance(body, dict) or not isinstance(body.get("operations"), list):
+        return jsonify({"error": "Expected a list of operations"}), 400
+    mode = body.get("mode", "atomic")
+    if mode not in {"atomic", "best_effort"}:
+        return jsonify({"error": "mode must be atomic or best_effort"}), 400
+    operations = body["operations"]
+    if len(operations) > BULK_MAX_OPERATIONS:
+        return jsonify({"error": f"At most {BULK_MAX_OPERATIONS} operations per request"}), 400
+
+    results = [None] * len(operations)
+    parsed = []
+    for index, operation in enumerate(operations):
+        try:
+            parsed.append(parse_bulk_operation(operation))
+        except ValueError as exc:
+            parsed.append(None)
+            results[index] = {"index": index, "status": 400, "error": str(exc)}
+
+    committed = True
+    if mode == "atomic":
+        if any(results):
+            committed = False
+        else:
+            try:
+                run_bulk_atomic(collection_name, parsed, user, results)
+            except BulkAborted:
+                committed = False
+        if not committed:
+            # Nothing was written: report the failures and mark the rest as skipped.
+            for index, operation in enumerate(parsed):
+                if results[index] is None or results[index]["status"] < 400:
+                    results[index] = {"index": index, "op": operation and operation[0],
+                                      "status": 424, "error": "Skipped: batch rolled back"}
+    else:
+        run_bulk_best_effort(collection_name, parsed, user, results)
+
+    failed = sum(1 for result in results if result["status"] >= 400)
+    response = {
+        "mode": mode,
+        "committed": committed,
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    }
+    if not committed:
+        status = 400 if any(result["status"] == 400 for result in results) else 409
+        return jsonify(response), status
+    return jsonify(response), 200
+
+
 # --- Custom Endpoints -----------------------------------------------------
+def sse_message(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json_dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def event_messages(event, user):
+    """SSE messages for one change event as seen by ``user`` (possibly none)."""
+    collection = event["collection"]
+    document = event["document"]
+    if collection == "notifications":
+        # Notifications are personal: only their recipient gets pushed them.
+        if document.get("user_email") != user["email"]:
+            return []
+    elif not can_see(collection, document, user):
+        return []
+    payload = {"collection": collection, "op": event["op"], "id": event["id"]}
+    if event["op"] != "delete":
+        document = dict(document)
+        document.pop("password_hash", None)
+        payload["document"] = document
+    messages = [sse_message("change", payload, event["seq"])]
+    if collection == "notifications" and event["op"] == "create":
+        messages.append(sse_message("notification", payload["document"]))
+    return messages
+
+
+def replay_events(since, user):
+    """Messages for changes after ``since`` from the change log, for reconnecting clients."""
+    head, compacted = change_log_head()
+    if since < compacted:
+        return None
+    with db_connection() as conn:
+        rows = conn.execute(
+            "SELECT seq, collection, doc_id, op, document FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?",
+            (since, SSE_CONFIG["replay_limit"] + 1),
+        ).fetchall()
+    if len(rows) > SSE_CONFIG["replay_limit"]:
+        return None
+    messages = []
+    for row in rows:
+        # Entries from before the log kept ops can only be replayed as updates.
+        op = "update" if row["op"] == "upsert" else row["op"]
+        event = {"seq": row["seq"], "collection": row["collection"], "op": op,
+                 "id": row["doc_id"], "document": json_loads(row["document"])}
+        messages.extend(event_messages(event, user))
+    return messages
+
+
+@app.route("/api/events", methods=["GET"])
+def event_stream():
+    """Server-Sent Events: change events for visible collections plus the caller's new notifications.
+
+    EventSource cannot send custom headers, so the session email may also
+    be passed as ``?email=``. Reconnecting clients send Last-Event-ID (the
+    change log seq) and get the missed events replayed, exactly as they
+    were sent live, or a ``resync`` event if too many were missed.
+    """
+    user = get_user_from_request_header(request) or get_session_user(request.args.get("email"))
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    subscription = EVENT_BROKER.subscribe(user)
+    if subscription is None:
+        return jsonify({"error": "Too many event subscribers"}), 503
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    backlog = []
+    if last_event_id:
+        try:
+            backlog = replay_events(int(last_event_id), user)
+        except ValueError:
+            backlog = None
+    heartbeat = SSE_CONFIG["heartbeat_seconds"]
+
+    def generate():
+        try:
+            yield f"retry: {int(heartbeat * 1000)}\n\n"
+            if backlog is None:
+                yield sse_message("resync", {"reason": "missed too many events"})
+            else:
+                yield from backlog
+            while True:
+                if subscription.overflowed:
+                    yield sse_message("resync", {"reason": "client fell behind"})
+                    return
+                try:
+                    event = subscription.events.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield from event_messages(event, user)
+        finally:
+            EVENT_BROKER.unsubscribe(subscription)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/api/search", methods=["GET"])
+def search():
+    """Ranked prefix search over assets, vendors and properties.
+
+    Query args: ``q`` (required), ``collections`` (comma-separated subset of
+    the searchable collections) and ``limit``.
+    """
+    user = get_user_from_request_header(request)
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+    if not SEARCH_AVAILABLE:
+        return jsonify({"error": "Search is not available on this server"}), 503
+
+    query = request.args.get("q", "")
+    if not search_match_expression(query):
+        return jsonify({"error": "q must contain at least one word"}), 400
+    collections = [name.strip() for name in request.args.get("collections", "").split(",") if name.strip()]
+    unknown = [name for name in collections if name not in SEARCH_FIELDS]
+    if unknown:
+        return jsonify({"error": f"Collections are not searchable: {', '.join(unknown)}"}), 400
+    try:
+        limit = int(request.args.get("limit", SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+
+    items = search_documents(query, collections or list(SEARCH_FIELDS), user, min(limit, SEARCH_MAX_LIMIT))
+    return jsonify({"query": query, "items": items}), 200
+
+
+@app.route("/api/dashboard/summary", methods=["GET"])
+def dashboard_summary():
+    user = get_user_from_request_header(request)
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(get_dashboard_summary(user)), 200
+
+
 @app.route("/api/notifications/mark_all_read", methods=["PUT"])
 def mark_all_notifications_read():
     user = get_user_from_request_header(request)
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
-    count = 0
-    notifications = db_list("notifications")
-    for notification in notifications:
-        if notification.get("user_email") == user["email"] and not notification.get("read"):
-            db_update("notifications", notification["id"], {"read": True})
-            count += 1
+    count = db_mark_notifications_read(user["email"])
+    return jsonify({"message": f"{count} notifications marked as read.", "count": count}), 200
+
+
+@app.route("/api/notifications/mark_read", methods=["PUT"])
+def mark_notifications_read():
+    user = get_user_from_request_header(request)
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    payload = request.get_json(silent=True) or {}
+    ids = payload.get("ids")
+    if not isinstance(ids, list) or not all(isinstance(doc_id, str) for doc_id in ids):
+        return jsonify({"error": "ids must be a list of notification ids"}), 400
 
-    return jsonify({"message": f"{count} notifications marked as read."}), 200
+    count = db_mark_notifications_read(user["email"], ids)
+    return jsonify({"message": f"{count} notifications marked as read.", "count": count}), 200
 
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+class UploadRejected(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def image_extension(head):
+    """The stored extension for an image starting with ``head``, or None if it is not one."""
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def store_image(stream, max_bytes):
+    """Copy an uploaded image into content-addressed storage.
+
+    The stream is hashed while it is written to a temporary file, so the
+    upload is never held in memory. Returns (filename, deduplicated).
+    """
+    tmp_path = os.path.join(UPLOAD_FOLDER, f".upload-{uuid.uuid4().hex}.tmp")
+    digest = hashlib.sha256()
+    head = b""
+    size = 0
+    try:
+        with open(tmp_path, "wb") as handle:
+            while chunk := stream.read(64 * 1024):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(f"Image must be at most {max_bytes} bytes", 413)
+                if len(head) < 12:
+                    head += chunk[:12]
+                digest.update(chunk)
+                handle.write(chunk)
+        extension = image_extension(head)
+        if extension is None:
+            raise UploadRejected("Invalid file type")
+        filename = f"{digest.hexdigest()}.{extension}"
+        path = os.path.join(UPLOAD_FOLDER, filename)
+        if os.path.exists(path):
+            return filename, True
+        os.replace(tmp_path, path)
+        return filename, False
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def image_variant_name(filename, variant):
+    stem, extension = filename.rsplit(".", 1)
+    return f"{stem}-{variant}.{extension}"
+
+
+def build_image_variants(filename):
+    """Write the resized variants of a stored image; runs on IMAGE_EXECUTOR."""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return  # Without Pillow, variant requests fall back to the original.
+    try:
+        for variant, longest_side in IMAGE_CONFIG["variants"].items():
+            path = os.path.join(UPLOAD_FOLDER, image_variant_name(filename, variant))
+            if os.path.exists(path):
+                continue
+            with Image.open(os.path.join(UPLOAD_FOLDER, filename)) as image:
+                image_format = image.format
+                resized = ImageOps.exif_transpose(image)
+                resized.thumbnail((longest_side, longest_side))
+                tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                resized.save(tmp_path, format=image_format)
+            os.replace(tmp_path, path)
+    except Exception as exc:
+        print(f"[IMAGES] Could not build variants of {filename}: {exc}")
+
+
 @app.route("/api/upload/property-image", methods=["POST"])
 def upload_property_image():
-    """Upload a property image."""
+    """Upload a property image.
+
+    Responds with the image URL; append ``?size=thumb`` or ``?size=preview``
+    for a resized variant.
+    """
     user = get_user_from_request_header(request)
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
+    max_bytes = IMAGE_CONFIG["max_upload_bytes"]
+    # Allow for the multipart envelope around the file itself.
+    if request.content_length is not None and request.content_length > max_bytes + 64 * 1024:
+        return jsonify({"error": f"Image must be at most {max_bytes} bytes"}), 413
+
     if "file" not in request.files:
         return jsonify({"error": "No file provided"}), 400
 
@@ -744,206 +3813,549 @@ def upload_property_image():
     if file.filename == "":
         return jsonify({"error": "No file selected"}), 400
 
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        # Add timestamp to make filename unique
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(UPLOAD_FOLDER, unique_filename)
-        file.save(filepath)
-        # Return relative URL path
-        image_url = f"/api/uploads/properties/{unique_filename}"
-        return jsonify({"url": image_url, "filename": unique_filename}), 200
+    if not allowed_file(file.filename):
+        return jsonify({"error": "Invalid file type"}), 400
 
-    return jsonify({"error": "Invalid file type"}), 400
+    try:
+        filename, deduplicated = store_image(file.stream, max_bytes)
+    except UploadRejected as exc:
+        return jsonify({"error": str(exc)}), exc.status
+    IMAGE_EXECUTOR.submit(build_image_variants, filename)
+
+    image_url = f"/api/uploads/properties/{filename}"
+    return jsonify({
+        "url": image_url,
+        "filename": filename,
+        "deduplicated": deduplicated,
+        "variants": {variant: f"{image_url}?size={variant}" for variant in IMAGE_CONFIG["variants"]},
+    }), 200
 
 
 @app.route("/api/uploads/properties/<filename>")
 def serve_property_image(filename):
-    """Serve uploaded property images."""
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    """Serve an uploaded property image, or its ``?size=`` variant.
+
+    Content-addressed files never change, so they are cached for a year.
+    A variant that is still being generated is answered with the original
+    and must be revalidated. Range requests and ETags are handled by
+    send_from_directory().
+    """
+    size = request.args.get("size")
+    if size and size not in IMAGE_CONFIG["variants"]:
+        return jsonify({"error": f"size must be one of: {', '.join(IMAGE_CONFIG['variants'])}"}), 400
+
+    content_addressed = bool(CONTENT_IMAGE_PATTERN.match(filename))
+    cache_control = IMMUTABLE_CACHE_CONTROL if content_addressed else "no-cache"
+    if size and content_addressed:
+        variant = image_variant_name(filename, size)
+        if os.path.isfile(os.path.join(UPLOAD_FOLDER, variant)):
+            filename = variant
+        else:
+            cache_control = "no-cache"
+    response = send_from_directory(UPLOAD_FOLDER, filename)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def stream_csv(headers, fields, chunks):
+    """Yield CSV text one chunk of documents at a time."""
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(headers)
+    for documents in chunks:
+        for document in documents:
+            writer.writerow([csv_cell(document.get(field)) for field in fields])
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate(0)
+    if output.tell():
+        yield output.getvalue()
+
+
+def csv_response(generator, filename):
+    return Response(
+        generator,
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
 
 @app.route("/api/reports/assets/csv", methods=["GET"])
 def export_assets_csv():
-    """Export assets as CSV."""
+    """Export assets as CSV, streamed from a database cursor."""
     user = get_user_from_request_header(request)
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
-    assets = db_list("assets")
-    # Filter assets based on user role
-    if user["role"] != "admin":
-        assets = [a for a in assets if a.get("assigned_to_email") == user["email"]]
+    chunks = db_iter("assets", *visibility_filter("assets", user))
+    headers = [header for header, _ in ASSET_CSV_COLUMNS]
+    fields = [field for _, field in ASSET_CSV_COLUMNS]
+    return csv_response(stream_csv(headers, fields, chunks), "assets_report.csv")
 
-    output = StringIO()
-    writer = csv.writer(output)
 
-    # Write header
-    writer.writerow([
-        "Asset ID", "Name", "Category", "Status", "Purchase Date",
-        "Purchase Value", "Current Value", "Serial Number", "Manufacturer",
-        "Warranty Expiry", "Assigned To", "Owner", "Location", "Created Date"
-    ])
+@app.route("/api/export/<collection_name>/csv", methods=["GET"])
+def export_collection_csv(collection_name):
+    """Stream any collection the caller can see as CSV.
 
-    # Write data
-    for asset in assets:
-        writer.writerow([
-            asset.get("asset_id", ""),
-            asset.get("name", ""),
-            asset.get("category", ""),
-            asset.get("status", ""),
-            asset.get("purchase_date", ""),
-            asset.get("purchase_value", ""),
-            asset.get("current_value", ""),
-            asset.get("serial_number", ""),
-            asset.get("manufacturer", ""),
-            asset.get("warranty_expiry", ""),
-            asset.get("assigned_to_email", ""),
-            asset.get("owner_email", ""),
-            asset.get("location", ""),
-            asset.get("created_date", ""),
-        ])
-
-    from flask import Response
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-Disposition": "attachment; filename=assets_report.csv"}
-    )
+    ``?columns=a,b,c`` picks the fields (and their order); by default the
+    fields of the newest document are used.
+    """
+    if not validate_collection(collection_name):
+        return jsonify({"error": "Collection not found"}), 404
+
+    user = get_user_from_request_header(request)
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
 
+    columns = [column.strip() for column in request.args.get("columns", "").split(",") if column.strip()]
+    if any(column in EXPORT_EXCLUDED_FIELDS for column in columns):
+        return jsonify({"error": "Requested columns cannot be exported"}), 400
 
-@app.route("/api/reports/assets/pdf", methods=["GET"])
-def export_assets_pdf():
-    """Export assets and properties as PDF."""
+    chunks = db_iter(collection_name, *visibility_filter(collection_name, user))
+    if not columns:
+        first = next(chunks, [])
+        columns = ["id"] + sorted(
+            key for key in (first[0] if first else {}) if key != "id" and key not in EXPORT_EXCLUDED_FIELDS
+        )
+        chunks = itertools.chain([first], chunks)
+    return csv_response(stream_csv(columns, columns, chunks), f"{collection_name}.csv")
+
+
+def parse_asset_csv_row(fields, values, user_email):
+    """Turn one import row into an asset document, raising ValueError if invalid."""
+    if len(values) != len(fields):
+        raise ValueError(f"Expected {len(fields)} columns")
+    asset = {field: value.strip() for field, value in zip(fields, values) if value.strip()}
+    if not asset.get("name"):
+        raise ValueError("Name is required")
+    for field in ("purchase_value", "current_value"):
+        if field in asset:
+            try:
+                value = float(asset[field].replace(",", ""))
+            except ValueError:
+                raise ValueError(f"{field} must be a number") from None
+            asset[field] = int(value) if value.is_integer() else value
+    for field in ("purchase_date", "warranty_expiry"):
+        if field in asset:
+            try:
+                if len(asset[field]) != 10:
+                    raise ValueError
+                date.fromisoformat(asset[field])
+            except ValueError:
+                raise ValueError(f"{field} must be a YYYY-MM-DD date") from None
+    if asset.get("category", "other") not in ASSET_CATEGORIES:
+        raise ValueError(f"Unknown category: {asset['category']}")
+    if asset.get("status", "active") not in ASSET_STATUSES:
+        raise ValueError(f"Unknown status: {asset['status']}")
+    for field in ("assigned_to_email", "owner_email"):
+        if field in asset:
+            if "@" not in asset[field]:
+                raise ValueError(f"{field} must be an email address")
+            asset[field] = asset[field].lower()
+    metadata = create_metadata(user_email)
+    if asset.get("created_date"):
+        metadata.pop("created_date")
+    return {**asset, **metadata}
+
+
+def import_asset_rows(fields, rows, user_email):
+    """Validate and insert CSV rows in batched transactions; returns the import report.
+
+    ``rows`` is consumed lazily, so memory stays bounded by the batch size
+    and the capped error list no matter how large the upload is.
+    """
+    report = {"imported": 0, "rejected": 0, "errors": []}
+
+    def reject(line, message):
+        report["rejected"] += 1
+        if len(report["errors"]) < CSV_IMPORT_MAX_ERRORS:
+            report["errors"].append({"line": line, "error": message})
+
+    def flush(batch):
+        try:
+            db_insert_many("assets", [asset for _, asset in batch])
+            report["imported"] += len(batch)
+        except sqlite3.IntegrityError:
+            # Retry one row at a time to find the conflicting ones.
+            for line, asset in batch:
+                try:
+                    db_insert("assets", asset)
+                    report["imported"] += 1
+                except sqlite3.IntegrityError:
+                    reject(line, "Conflicts with an existing record")
+
+    batch = []
+    for line, values in rows:
+        try:
+            batch.append((line, parse_asset_csv_row(fields, values, user_email)))
+        except ValueError as exc:
+            reject(line, str(exc))
+            continue
+        if len(batch) >= CSV_IMPORT_BATCH_SIZE:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return report
+
+
+@app.route("/api/import/assets/csv", methods=["POST"])
+def import_assets_csv():
+    """Import assets from a CSV using the export's column layout.
+
+    Accepts a raw ``text/csv`` body or a multipart ``file`` field; either way
+    the upload is read row by row rather than loaded into memory.
+    """
     user = get_user_from_request_header(request)
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
+    if request.mimetype == "multipart/form-data":
+        upload = request.files.get("file")
+        if not upload:
+            return jsonify({"error": "No file provided"}), 400
+        stream = upload.stream
+    else:
+        stream = request.stream
+    text = io.TextIOWrapper(io.BufferedReader(stream), encoding="utf-8-sig", newline="")
+
+    columns = dict(ASSET_CSV_COLUMNS)
+    reader = csv.reader(text)
+    try:
+        header = next(reader)
+    except StopIteration:
+        return jsonify({"error": "CSV file is empty"}), 400
+    except UnicodeDecodeError:
+        return jsonify({"error": "CSV must be UTF-8 encoded"}), 400
+    header = [column.strip() for column in header]
+    if "Name" not in header:
+        return jsonify({"error": "CSV header must include a Name column"}), 400
+    unknown = [column for column in header if column not in columns]
+    if unknown:
+        return jsonify({"error": f"Unknown columns: {', '.join(unknown)}"}), 400
+
+    rows = ((reader.line_num, values) for values in reader if any(values))
     try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.lib import colors
-        from io import BytesIO
-
-        assets = db_list("assets")
-        if user["role"] != "admin":
-            assets = [a for a in assets if a.get("assigned_to_email") == user["email"]]
-        
-        properties = db_list("properties")
-
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        elements = []
-        styles = getSampleStyleSheet()
-
-        # Title
-        title = Paragraph("Asset & Property Management Report", styles["Title"])
-        elements.append(title)
-        elements.append(Spacer(1, 12))
-
-        # Report info
-        total_asset_value = sum(float(a.get("current_value", 0) or 0) for a in assets)
-        total_property_value = sum(float(p.get("price") or p.get("monthly_cost") or 0) for p in properties)
-        
-        info_text = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>"
-        info_text += f"Total Assets: {len(assets)} | Total Properties: {len(properties)}<br/>"
-        info_text += f"Total Asset Value: ₹{total_asset_value:,.0f} | Total Property Value: ₹{total_property_value:,.0f}<br/>"
-        info_text += f"Report for: {user.get('full_name', user.get('email', 'User'))}"
-        info = Paragraph(info_text, styles["Normal"])
-        elements.append(info)
+        report = import_asset_rows([columns[column] for column in header], rows, user["email"])
+    except (UnicodeDecodeError, csv.Error) as exc:
+        return jsonify({"error": f"Could not read CSV: {exc}"}), 400
+    return jsonify(report), 200
+
+
+def report_scope(user):
+    """Return (scope key, label) describing which assets a report covers for ``user``."""
+    if visibility_filter("assets", user)[0]:
+        return f"user:{user['email']}", user["email"]
+    return "all", "All users"
+
+
+def report_job_id(user):
+    """Cache key for a user's report: their scope plus the asset/property data versions."""
+    scope, _ = report_scope(user)
+    versions = get_collection_versions(["assets", "properties"])
+    scope_hash = hashlib.sha256(scope.encode()).hexdigest()[:24]
+    return f"{scope_hash}-{versions['assets']}-{versions['properties']}"
+
+
+def report_path(job_id, suffix):
+    return os.path.join(REPORT_CONFIG["cache_dir"], f"{job_id}{suffix}")
+
+
+def render_assets_pdf(path, assets, properties, report_for):
+    """Render the asset & property report to ``path``."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib import colors
+    from io import BytesIO
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    elements = []
+    styles = getSampleStyleSheet()
+
+    # Title
+    title = Paragraph("Asset & Property Management Report", styles["Title"])
+    elements.append(title)
+    elements.append(Spacer(1, 12))
+
+    # Report info
+    total_asset_value = sum(float(a.get("current_value", 0) or 0) for a in assets)
+    total_property_value = sum(float(p.get("price") or p.get("monthly_cost") or 0) for p in properties)
+
+    info_text = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>"
+    info_text += f"Total Assets: {len(assets)} | Total Properties: {len(properties)}<br/>"
+    info_text += f"Total Asset Value: ₹{total_asset_value:,.0f} | Total Property Value: ₹{total_property_value:,.0f}<br/>"
+    info_text += f"Report for: {report_for}"
+    info = Paragraph(info_text, styles["Normal"])
+    elements.append(info)
+    elements.append(Spacer(1, 20))
+
+    # Assets Table
+    if assets:
+        assets_title = Paragraph("<b>Assets</b>", styles["Heading2"])
+        elements.append(assets_title)
+        elements.append(Spacer(1, 10))
+
+        assets_data = [["Asset ID", "Name", "Category", "Status", "Value"]]
+        for asset in assets:
+            assets_data.append([
+                asset.get("asset_id", "")[:15],
+                asset.get("name", "")[:25],  # Truncate long names
+                asset.get("category", "")[:15],
+                asset.get("status", "")[:12],
+                f"₹{asset.get('current_value', 0) or 0:,.0f}",
+            ])
+
+        assets_table = Table(assets_data)
+        assets_table.setStyle(TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, 0), 9),
+            ("FONTSIZE", (0, 1), (-1, -1), 8),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+            ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+        ]))
+        elements.append(assets_table)
         elements.append(Spacer(1, 20))
 
-        # Assets Table
+    # Properties Table
+    if properties:
         if assets:
-            assets_title = Paragraph("<b>Assets</b>", styles["Heading2"])
-            elements.append(assets_title)
-            elements.append(Spacer(1, 10))
-            
-            assets_data = [["Asset ID", "Name", "Category", "Status", "Value"]]
-            for asset in assets:
-                assets_data.append([
-                    asset.get("asset_id", "")[:15],
-                    asset.get("name", "")[:25],  # Truncate long names
-                    asset.get("category", "")[:15],
-                    asset.get("status", "")[:12],
-                    f"₹{asset.get('current_value', 0) or 0:,.0f}",
-                ])
-
-            assets_table = Table(assets_data)
-            assets_table.setStyle(TableStyle([
-                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, 0), 9),
-                ("FONTSIZE", (0, 1), (-1, -1), 8),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-                ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-            ]))
-            elements.append(assets_table)
-            elements.append(Spacer(1, 20))
-
-        # Properties Table
-        if properties:
-            if assets:
-                elements.append(PageBreak())
-            
-            properties_title = Paragraph("<b>Properties</b>", styles["Heading2"])
-            elements.append(properties_title)
-            elements.append(Spacer(1, 10))
-            
-            properties_data = [["Property Name", "Type", "Location", "Status", "Price/Monthly"]]
-            for prop in properties:
-                price_value = prop.get("price") or prop.get("monthly_cost") or 0
-                price_display = f"₹{price_value:,.0f}"
-                if prop.get("monthly_cost") and not prop.get("price"):
-                    price_display += "/mo"
-                
-                properties_data.append([
-                    prop.get("property_name", "")[:25],
-                    prop.get("property_type", "")[:15],
-                    f"{prop.get('city', '')}, {prop.get('state', '')}"[:20],
-                    prop.get("status", "")[:12],
-                    price_display,
-                ])
-
-            properties_table = Table(properties_data)
-            properties_table.setStyle(TableStyle([
-                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, 0), 9),
-                ("FONTSIZE", (0, 1), (-1, -1), 8),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-                ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-            ]))
-            elements.append(properties_table)
-
-        if not assets and not properties:
-            no_data = Paragraph("No assets or properties to display.", styles["Normal"])
-            elements.append(no_data)
-
-        doc.build(elements)
-
-        from flask import Response
-        return Response(
-            buffer.getvalue(),
-            mimetype="application/pdf",
-            headers={"Content-Disposition": "attachment; filename=assets_and_properties_report.pdf"}
-        )
+            elements.append(PageBreak())
+
+        properties_title = Paragraph("<b>Properties</b>", styles["Heading2"])
+        elements.append(properties_title)
+        elements.append(Spacer(1, 10))
+
+        properties_data = [["Property Name", "Type", "Location", "Status", "Price/Monthly"]]
+        for prop in properties:
+            price_value = prop.get("price") or prop.get("monthly_cost") or 0
+            price_display = f"₹{price_value:,.0f}"
+            if prop.get("monthly_cost") and not prop.get("price"):
+                price_display += "/mo"
+
+            properties_data.append([
+                prop.get("property_name", "")[:25],
+                prop.get("property_type", "")[:15],
+                f"{prop.get('city', '')}, {prop.get('state', '')}"[:20],
+                prop.get("status", "")[:12],
+                price_display,
+            ])
+
+        properties_table = Table(properties_data)
+        properties_table.setStyle(TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, 0), 9),
+            ("FONTSIZE", (0, 1), (-1, -1), 8),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+            ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+        ]))
+        elements.append(properties_table)
+
+    if not assets and not properties:
+        no_data = Paragraph("No assets or properties to display.", styles["Normal"])
+        elements.append(no_data)
+
+    doc.build(elements)
+
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(buffer.getvalue())
+    os.replace(tmp_path, path)
+
+
+def run_report_job(job_id, user):
+    """Build one report artifact; runs on REPORT_EXECUTOR."""
+    try:
+        _, report_for = report_scope(user)
+        with db_connection() as conn:
+            # One read transaction so assets and properties come from the same snapshot.
+            conn.execute("BEGIN")
+            try:
+                assets = db_list("assets", *visibility_filter("assets", user))
+                properties = db_list("properties")
+            finally:
+                conn.execute("COMMIT")
+        render_assets_pdf(report_path(job_id, ".pdf"), assets, properties, report_for)
+    except Exception as exc:
+        print(f"[REPORTS] Report {job_id} failed: {exc}")
+        with open(report_path(job_id, ".failed"), "w", encoding="utf-8") as handle:
+            handle.write(str(exc))
+    finally:
+        with REPORT_JOBS_LOCK:
+            REPORT_JOBS.pop(job_id, None)
+        try:
+            os.remove(report_path(job_id, ".pending"))
+        except FileNotFoundError:
+            pass
+        prune_report_cache(job_id)
+
+
+def prune_report_cache(job_id):
+    """Drop artifacts for the same scope built from older data versions."""
+    scope_hash = job_id.split("-", 1)[0]
+    for name in os.listdir(REPORT_CONFIG["cache_dir"]):
+        if name.startswith(f"{scope_hash}-") and not name.startswith(f"{job_id}."):
+            if name.endswith(".pending"):
+                continue
+            try:
+                os.remove(os.path.join(REPORT_CONFIG["cache_dir"], name))
+            except FileNotFoundError:
+                pass
+
+
+def report_status(job_id):
+    """Status of a report job, read from the artifact directory so every worker process agrees."""
+    if os.path.exists(report_path(job_id, ".pdf")):
+        return "done"
+    if os.path.exists(report_path(job_id, ".failed")):
+        return "failed"
+    with REPORT_JOBS_LOCK:
+        if job_id in REPORT_JOBS:
+            return "running"
+    try:
+        started = os.path.getmtime(report_path(job_id, ".pending"))
+    except FileNotFoundError:
+        return None
+    # A marker older than the stale limit belongs to a worker that died mid-job.
+    if time.time() - started > REPORT_CONFIG["stale_seconds"]:
+        return None
+    return "running"
+
+
+def submit_report_job(user):
+    """Return (job_id, status), queueing a build unless a fresh one exists or is running."""
+    job_id = report_job_id(user)
+    with REPORT_JOBS_LOCK:
+        status = report_status(job_id)
+        if status in {"done", "running"}:
+            return job_id, status
+        try:
+            os.remove(report_path(job_id, ".failed"))
+        except FileNotFoundError:
+            pass
+        with open(report_path(job_id, ".pending"), "w", encoding="utf-8") as handle:
+            handle.write(str(os.getpid()))
+        REPORT_JOBS[job_id] = REPORT_EXECUTOR.submit(run_report_job, job_id, dict(user))
+    return job_id, "running"
+
+
+def report_job_payload(job_id, status):
+    payload = {
+        "job_id": job_id,
+        "status": status,
+        "status_url": f"/api/reports/assets/pdf/jobs/{job_id}",
+    }
+    if status == "done":
+        payload["download_url"] = f"/api/reports/assets/pdf/jobs/{job_id}/download"
+    if status == "failed":
+        with open(report_path(job_id, ".failed"), encoding="utf-8") as handle:
+            payload["error"] = handle.read()
+    return payload
+
+
+def user_owns_report(user, job_id):
+    if not REPORT_JOB_ID_PATTERN.match(job_id):
+        return False
+    scope, _ = report_scope(user)
+    return job_id.split("-", 1)[0] == hashlib.sha256(scope.encode()).hexdigest()[:24]
+
+
+def send_report(job_id):
+    return send_from_directory(
+        REPORT_CONFIG["cache_dir"],
+        f"{job_id}.pdf",
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name="assets_and_properties_report.pdf",
+    )
+
+
+def reportlab_missing():
+    try:
+        import reportlab  # noqa: F401
     except ImportError:
         return jsonify({"error": "PDF generation requires reportlab. Install with: pip install reportlab"}), 500
+    return None
+
+
+@app.route("/api/reports/assets/pdf/jobs", methods=["POST"])
+def create_assets_pdf_job():
+    """Queue (or reuse) a PDF report build and return its job."""
+    user = get_user_from_request_header(request)
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+    missing = reportlab_missing()
+    if missing:
+        return missing
+
+    job_id, status = submit_report_job(user)
+    return jsonify(report_job_payload(job_id, status)), 200 if status == "done" else 202
+
+
+@app.route("/api/reports/assets/pdf/jobs/<job_id>", methods=["GET"])
+def get_assets_pdf_job(job_id):
+    user = get_user_from_request_header(request)
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+    status = report_status(job_id) if user_owns_report(user, job_id) else None
+    if not status:
+        return jsonify({"error": "Report job not found"}), 404
+    return jsonify(report_job_payload(job_id, status)), 200
+
+
+@app.route("/api/reports/assets/pdf/jobs/<job_id>/download", methods=["GET"])
+def download_assets_pdf_job(job_id):
+    user = get_user_from_request_header(request)
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+    if not user_owns_report(user, job_id) or report_status(job_id) != "done":
+        return jsonify({"error": "Report not ready"}), 404
+    return send_report(job_id)
+
+
+@app.route("/api/reports/assets/pdf", methods=["GET"])
+def export_assets_pdf():
+    """Export assets and properties as PDF.
+
+    Serves the cached report when one matches the caller's scope and the
+    current data; otherwise queues a build and answers 202 with the job.
+    """
+    user = get_user_from_request_header(request)
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+    missing = reportlab_missing()
+    if missing:
+        return missing
+
+    job_id, status = submit_report_job(user)
+    if status == "done":
+        return send_report(job_id)
+    return jsonify(report_job_payload(job_id, status)), 202
 
 
 # --- Server Entrypoint ----------------------------------------------------
 if __name__ == "__main__":
+    # Password workers would import this script again; see PasswordHasher.
+    PASSWORD_CONFIG["workers"] = 0
     print("Starting Flask Asset Management API on http://127.0.0.1:5000")
     print("Test users: admin@org.com, manager@org.com, user@org.com")
     app.run(debug=True)
@@ -0,0 +1,104 @@
+"""Compare API throughput with connect-per-call SQLite vs. the pooled WAL setup.
+
+Each configuration runs in its own subprocess against a fresh temporary
+database, because ``backend`` reads its database settings at import time.
+
+    python benchmarks/bench_connections.py --threads 8 --seconds 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGS = {
+    # Mirrors the original behaviour: a new connection per helper call,
+    # rollback journal and SQLite's default pragmas.
+    "connect-per-call": {
+        "DB_POOL_SIZE": "0",
+        "DB_JOURNAL_MODE": "DELETE",
+        "DB_SYNCHRONOUS": "FULL",
+        "DB_CACHE_SIZE": "-2000",
+        "DB_MMAP_SIZE": "0",
+    },
+    "pooled-wal": {},
+}
+
+
+def run_worker(threads, seconds):
+    sys.path.insert(0, REPO_DIR)
+    import backend
+
+    email = "admin@org.com"
+    backend.SESSION_STORE.add_session(email)
+    headers = {"X-User-Email": email}
+    counts = [0] * threads
+    errors = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        client = backend.app.test_client()
+        step = 0
+        while time.perf_counter() < deadline:
+            if step % 4 == 3:
+                response = client.put(
+                    "/api/assets/ast-001", json={"notes": f"bench {index}-{step}"}, headers=headers
+                )
+            elif step % 4 == 2:
+                response = client.get("/api/assets/ast-002", headers=headers)
+            else:
+                response = client.get("/api/assets", headers=headers)
+            if response.status_code >= 400:
+                errors[index] += 1
+            counts[index] += 1
+            step += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    print(json.dumps({"requests": sum(counts), "errors": sum(errors), "seconds": elapsed}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.threads, args.seconds)
+        return
+
+    results = {}
+    for name, overrides in CONFIGS.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, **overrides, "DB_PATH": os.path.join(tmp, "bench.db")}
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker",
+                 "--threads", str(args.threads), "--seconds", str(args.seconds)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            results[name] = json.loads(output.strip().splitlines()[-1])
+
+    baseline = None
+    for name, result in results.items():
+        rps = result["requests"] / result["seconds"]
+        baseline = baseline or rps
+        print(
+            f"{name:>18}: {rps:8.1f} req/s  ({result['requests']} requests, "
+            f"{result['errors']} errors, x{rps / baseline:.2f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
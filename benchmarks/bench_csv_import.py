@@ -0,0 +1,74 @@
+"""Time the streaming asset CSV import and report its peak memory.
+
+Generates a CSV in the export's column layout, posts it to
+``/api/import/assets/csv`` in-process against a throwaway database and
+prints rows/sec plus the growth in peak RSS while importing.
+
+    python benchmarks/bench_csv_import.py --rows 500000
+"""
+import argparse
+import csv
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATEGORIES = ["computer", "mobile_device", "furniture", "vehicle", "networking", "other"]
+STATUSES = ["active", "in_maintenance", "retired", "in_storage"]
+
+
+def write_csv(path, rows, header):
+    rng = random.Random(42)
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(header)
+        for index in range(rows):
+            value = rng.randint(1_000, 300_000)
+            writer.writerow([
+                f"AST-{index:07d}", f"Asset {index}", rng.choice(CATEGORIES), rng.choice(STATUSES),
+                "2024-01-15", value, int(value * 0.8), f"SN{index:09d}", "Acme",
+                "2027-01-15", f"user{index % 500}@org.com", "admin@org.com",
+                f"Floor {index % 12}", "",
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        sys.path.insert(0, REPO_DIR)
+        import backend
+
+        csv_path = os.path.join(tmp, "assets.csv")
+        write_csv(csv_path, args.rows, [header for header, _ in backend.ASSET_CSV_COLUMNS])
+        size = os.path.getsize(csv_path)
+
+        backend.SESSION_STORE.add_session("admin@org.com")
+        client = backend.app.test_client()
+        baseline_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        with open(csv_path, "rb") as handle:
+            response = client.post(
+                "/api/import/assets/csv",
+                input_stream=handle,
+                content_length=size,
+                headers={"X-User-Email": "admin@org.com", "Content-Type": "text/csv"},
+            )
+        elapsed = time.perf_counter() - started
+        peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        report = response.get_json()
+        print(f"status {response.status_code}: imported {report['imported']}, rejected {report['rejected']}")
+        print(f"{args.rows} rows ({size / 1e6:.1f} MB) in {elapsed:.1f}s -> {args.rows / elapsed:,.0f} rows/s")
+        print(f"peak RSS growth during import: {(peak_kib - baseline_kib) / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Load-test the key API endpoints against a synthetic dataset.
+
+Seeds a throwaway database with ``seed_data.py`` at ``--scale``, then
+drives each endpoint in-process from ``--threads`` threads and reports
+throughput plus p50/p95/p99 latency. Requests rotate across many users of
+the relevant role so the role filters see realistic data. Results are
+saved as JSON under ``benchmarks/results/`` and compared with the latest
+earlier run at the same scale.
+
+    python benchmarks/bench_endpoints.py --scale 10 --requests 200 --threads 4
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+USERS_PER_ROLE = 50
+
+
+def endpoint_specs(rng, asset_ids, search_words):
+    """(name, role, share of --requests, request builder) for every benchmarked endpoint.
+
+    A builder takes the acting user's email and returns (method, path, json body).
+    """
+    def fixed(method, path, body=None):
+        return lambda email: (method, path, body)
+
+    def search(email):
+        return "GET", f"/api/search?q={rng.choice(search_words)}", None
+
+    def update_asset(email):
+        return "PUT", f"/api/assets/{rng.choice(asset_ids)}", {"notes": f"bench {rng.random()}"}
+
+    def create_asset(email):
+        return "POST", "/api/assets", {"name": "Bench asset", "category": "computer", "status": "active"}
+
+    return [
+        ("list assets ?all (admin)", "admin", 0.25, fixed("GET", "/api/assets?all=true")),
+        ("list assets page (user)", "user", 1, fixed("GET", "/api/assets?limit=100")),
+        ("list loans ?all (user)", "user", 1, fixed("GET", "/api/loans?all=true")),
+        ("list maintenances page (manager)", "manager", 1, fixed("GET", "/api/maintenances?limit=100")),
+        ("get asset", "admin", 1, lambda email: ("GET", f"/api/assets/{rng.choice(asset_ids)}", None)),
+        ("dashboard summary (user)", "user", 1, fixed("GET", "/api/dashboard/summary")),
+        ("search", "manager", 1, search),
+        ("mark all notifications read", "user", 1, fixed("PUT", "/api/notifications/mark_all_read")),
+        ("asset CSV report (admin)", "admin", 0.1, fixed("GET", "/api/reports/assets/csv")),
+        ("export assets CSV (admin)", "admin", 0.1, fixed("GET", "/api/export/assets/csv")),
+        ("create asset", "admin", 1, create_asset),
+        ("update asset", "admin", 1, update_asset),
+    ]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_endpoint(backend, build, emails, requests, threads):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        client = backend.app.test_client()
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            email = emails[index % len(emails)]
+            method, path, body = build(email)
+            started = time.perf_counter()
+            response = client.open(path, method=method, json=body, headers={"X-User-Email": email})
+            response.get_data()
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code >= 400:
+                    errors[0] += 1
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "throughput_rps": len(latencies) / wall,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def previous_run(scale):
+    for path in sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")), reverse=True):
+        with open(path, encoding="utf-8") as handle:
+            run = json.load(handle)
+        if run["config"]["scale"] == scale:
+            return path, run
+    return None, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--label", default="", help="free-form note stored with the results")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        sys.path.insert(0, REPO_DIR)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import backend
+        import seed_data
+
+        started = time.perf_counter()
+        counts = seed_data.seed(backend, args.scale)
+        print(f"Seeded {sum(counts.values())} documents in {time.perf_counter() - started:.1f}s")
+
+        users = backend.db_list("users")
+        emails_by_role = {}
+        for user in users:
+            emails_by_role.setdefault(user.get("role"), []).append(user["email"])
+        for role, emails in emails_by_role.items():
+            emails_by_role[role] = emails[:USERS_PER_ROLE]
+            for email in emails_by_role[role]:
+                backend.SESSION_STORE.add_session(email)
+        asset_ids = [asset["id"] for asset in backend.db_list("assets")]
+
+        rng = random.Random(7)
+        results = {}
+        print(f"{'endpoint':<34} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for name, role, share, build in endpoint_specs(rng, asset_ids, seed_data.SEARCH_WORDS):
+            requests = max(1, int(args.requests * share))
+            # Warm caches and connections before measuring.
+            run_endpoint(backend, build, emails_by_role[role], min(5, requests), 1)
+            result = run_endpoint(backend, build, emails_by_role[role], requests, args.threads)
+            results[name] = result
+            print(
+                f"{name:<34} {result['throughput_rps']:8.1f} {result['p50_ms']:8.1f} "
+                f"{result['p95_ms']:8.1f} {result['p99_ms']:8.1f} {result['errors']:7d}"
+            )
+
+    run = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "label": args.label,
+        "config": {"scale": args.scale, "requests": args.requests, "threads": args.threads},
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "dataset": counts,
+        "endpoints": results,
+    }
+
+    previous_path, previous = previous_run(args.scale)
+    if previous:
+        print(f"\nChange in p50 vs. {os.path.basename(previous_path)} ({previous['commit']}):")
+        for name, result in results.items():
+            before = previous["endpoints"].get(name)
+            if before:
+                change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100
+                print(f"  {name:<34} {before['p50_ms']:8.1f} -> {result['p50_ms']:8.1f} ms ({change:+.0f}%)")
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"endpoints-{stamp}-{run['commit']}.json")
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(run, handle, indent=2)
+        print(f"\nSaved {os.path.relpath(path, REPO_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
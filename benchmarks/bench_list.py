@@ -0,0 +1,94 @@
+"""Compare the ways GET /api/<collection>?all=true can build its response.
+
+Seeds a throwaway database with ``--docs`` assets, then times the previous
+parse-and-reserialize path (``jsonify(db_list(...))``) with the standard
+library and with orjson, against the passthrough route that streams the
+stored document text.
+
+    python benchmarks/bench_list.py --docs 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_asset(rng, index):
+    value = rng.randint(1_000, 300_000)
+    return {
+        "asset_id": f"AST-{index:07d}",
+        "name": f"Asset {index}",
+        "category": rng.choice(["computer", "mobile_device", "furniture", "vehicle"]),
+        "status": rng.choice(["active", "in_maintenance", "retired", "in_storage"]),
+        "purchase_date": "2024-01-15",
+        "purchase_value": value,
+        "current_value": int(value * 0.8),
+        "serial_number": f"SN{index:09d}",
+        "manufacturer": "Acme",
+        "assigned_to_email": f"user{index % 500}@org.com",
+        "owner_email": "admin@org.com",
+        "location": f"Floor {index % 12}",
+        "notes": "Seeded by bench_list.py",
+    }
+
+
+def best_of(runs, build):
+    timings = []
+    size = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        size = len(build())
+        timings.append(time.perf_counter() - started)
+    return min(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        sys.path.insert(0, REPO_DIR)
+        import backend
+
+        rng = random.Random(42)
+        for start in range(0, args.docs, 5000):
+            stop = min(start + 5000, args.docs)
+            backend.db_insert_many("assets", [make_asset(rng, index) for index in range(start, stop)])
+
+        email = "admin@org.com"
+        backend.SESSION_STORE.add_session(email)
+        client = backend.app.test_client()
+
+        def parsed(codec):
+            def build():
+                backend.JSON_CODEC = codec
+                with backend.app.test_request_context():
+                    return backend.jsonify(backend.db_list("assets")).get_data()
+            return build
+
+        def passthrough():
+            return client.get("/api/assets?all=true", headers={"X-User-Email": email}).get_data()
+
+        paths = [("parse + stdlib json", parsed("json"))]
+        if backend.orjson is not None:
+            paths.append(("parse + orjson", parsed("orjson")))
+        paths.append(("passthrough", passthrough))
+
+        baseline = None
+        for name, build in paths:
+            seconds, size = best_of(args.runs, build)
+            baseline = baseline or seconds
+            print(
+                f"{name:>20}: {seconds * 1000:8.1f} ms  ({size / 1e6:.1f} MB, x{baseline / seconds:.1f})"
+            )
+
+
+if __name__ == "__main__":
+    main()
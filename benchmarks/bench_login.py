@@ -0,0 +1,109 @@
+"""Measure concurrent password-login throughput with inline vs. pooled hashing.
+
+Each configuration runs in its own subprocess against a fresh temporary
+database, because ``backend`` reads its settings at import time. While
+the login threads run, one more thread polls ``/health`` to show how much
+the hashing stalls unrelated requests.
+
+    python benchmarks/bench_login.py --threads 16 --seconds 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGS = {
+    "inline": {"PASSWORD_WORKERS": "0"},
+    "process-pool": {},
+}
+USERS = 20
+PASSWORD = "bench-password"
+
+
+def run_worker(threads, seconds):
+    sys.path.insert(0, REPO_DIR)
+    import backend
+
+    setup = backend.app.test_client()
+    for index in range(USERS):
+        setup.post("/api/auth/signup", json={"email": f"bench{index}@org.com", "password": PASSWORD})
+
+    logins = [0] * threads
+    shed = [0] * threads
+    health_latencies = []
+    deadline = time.perf_counter() + seconds
+
+    def login_worker(index):
+        client = backend.app.test_client()
+        step = 0
+        while time.perf_counter() < deadline:
+            email = f"bench{(index + step) % USERS}@org.com"
+            response = client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+            if response.status_code == 200:
+                logins[index] += 1
+            elif response.status_code == 503:
+                shed[index] += 1
+            step += 1
+
+    def health_worker():
+        client = backend.app.test_client()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            client.get("/health")
+            health_latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    pool = [threading.Thread(target=login_worker, args=(i,)) for i in range(threads)]
+    pool.append(threading.Thread(target=health_worker))
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    health_latencies.sort()
+    print(json.dumps({
+        "logins": sum(logins),
+        "shed": sum(shed),
+        "seconds": elapsed,
+        "health_p50_ms": statistics.median(health_latencies) * 1000,
+        "health_p99_ms": health_latencies[int(len(health_latencies) * 0.99)] * 1000,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.threads, args.seconds)
+        return
+
+    for name, overrides in CONFIGS.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, **overrides, "DB_PATH": os.path.join(tmp, "bench.db")}
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker",
+                 "--threads", str(args.threads), "--seconds", str(args.seconds)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{name:>13}: {result['logins'] / result['seconds']:7.1f} logins/s  "
+            f"({result['shed']} shed with 503)  /health p50 {result['health_p50_ms']:.1f} ms, "
+            f"p99 {result['health_p99_ms']:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
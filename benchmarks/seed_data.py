@@ -0,0 +1,244 @@
+"""Generate a synthetic AssetFlow dataset at any scale.
+
+Documents go through ``backend.db_insert_many`` so the summary counters,
+search index and change log are maintained exactly as for real writes.
+The generator is deterministic for a given ``--seed``.
+
+Per unit of ``--scale``: 100 users, 1,000 assets, 200 loans, 100
+maintenances, 50 procurements, 2,000 activities and 1,000 notifications.
+
+    DB_PATH=/tmp/synthetic.db python benchmarks/seed_data.py --scale 10
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PER_SCALE = {
+    "users": 100,
+    "assets": 1_000,
+    "loans": 200,
+    "maintenances": 100,
+    "procurements": 50,
+    "activities": 2_000,
+    "notifications": 1_000,
+}
+BATCH_SIZE = 2_000
+
+ROLES = [("admin", 0.03), ("manager", 0.12), ("user", 0.85)]
+DEPARTMENTS = ["Engineering", "Sales", "Finance", "Operations", "HR", "Marketing", "Support"]
+# category: (weight, median purchase value, typical manufacturers)
+ASSET_CATEGORIES = {
+    "computer": (0.35, 90_000, ["Apple", "Dell", "Lenovo", "HP"]),
+    "mobile_device": (0.2, 45_000, ["Apple", "Samsung", "Google"]),
+    "furniture": (0.15, 12_000, ["Herman Miller", "Steelcase", "IKEA"]),
+    "office_equipment": (0.1, 25_000, ["Canon", "Epson", "Brother"]),
+    "networking": (0.08, 60_000, ["Cisco", "Ubiquiti", "Netgear"]),
+    "software_license": (0.06, 20_000, ["Microsoft", "Adobe", "JetBrains"]),
+    "vehicle": (0.03, 900_000, ["Tata", "Mahindra", "Toyota"]),
+    "machinery": (0.03, 400_000, ["Bosch", "Siemens"]),
+}
+ASSET_STATUSES = [("active", 0.7), ("in_storage", 0.12), ("in_maintenance", 0.08), ("retired", 0.07), ("lost", 0.03)]
+LOAN_STATUSES = [("returned", 0.55), ("active", 0.3), ("overdue", 0.1), ("pending", 0.05)]
+MAINTENANCE_STATUSES = [("completed", 0.5), ("pending", 0.2), ("approved", 0.15), ("in_progress", 0.15)]
+PROCUREMENT_STATUSES = [
+    ("purchased", 0.35), ("pending", 0.25), ("manager_approved", 0.15),
+    ("admin_approved", 0.15), ("rejected", 0.1),
+]
+ACTIONS = ["CREATE_ASSET", "UPDATE_ASSET", "CREATE_LOAN", "RETURN_LOAN", "CREATE_MAINTENANCE", "CREATE_PROCUREMENT"]
+SEARCH_WORDS = ["laptop", "monitor", "desk", "router", "printer", "phone", "chair", "server", "license", "van"]
+
+
+def pick(rng, weighted):
+    return rng.choices([value for value, _ in weighted], [weight for _, weight in weighted])[0]
+
+
+def skewed(rng, items):
+    """Pick from ``items`` with a long tail: a few entries get most of the picks."""
+    return items[int(len(items) * rng.random() ** 2.5)]
+
+
+def when(rng, now, max_days=730):
+    return now - timedelta(days=rng.uniform(0, max_days))
+
+
+def generate(scale, seed=42):
+    """Yield (collection, documents) batches for a dataset of the given scale."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    counts = {collection: max(1, int(per * scale)) for collection, per in PER_SCALE.items()}
+
+    users = []
+    for index in range(counts["users"]):
+        role = pick(rng, ROLES) if index else "admin"
+        users.append({
+            "id": f"syn-user-{index:07d}",
+            "email": f"{role}{index}@synthetic.test",
+            "full_name": f"Synthetic {role.title()} {index}",
+            "role": role,
+            "department": rng.choice(DEPARTMENTS),
+            "phone": f"+91 98{rng.randint(10_000_000, 99_999_999)}",
+            "employee_id": f"EMP{index:06d}",
+            "created_date": when(rng, now).isoformat(),
+        })
+    yield "users", users
+    # The popular end of skewed() picks lands on ordinary users, who hold most assets.
+    holders = [user for user in users if user["role"] == "user"] or users
+    rng.shuffle(holders)
+
+    asset_names = []
+    for start in range(0, counts["assets"], BATCH_SIZE):
+        batch = []
+        for index in range(start, min(start + BATCH_SIZE, counts["assets"])):
+            category = rng.choices(list(ASSET_CATEGORIES), [spec[0] for spec in ASSET_CATEGORIES.values()])[0]
+            _, median_value, manufacturers = ASSET_CATEGORIES[category]
+            created = when(rng, now)
+            purchased = created - timedelta(days=rng.uniform(0, 60))
+            value = round(median_value * math.exp(rng.gauss(0, 0.5)))
+            age_years = (now - purchased).days / 365
+            name = f"{rng.choice(manufacturers)} {rng.choice(SEARCH_WORDS)} {index}"
+            asset_names.append((f"syn-ast-{index:07d}", name))
+            batch.append({
+                "id": f"syn-ast-{index:07d}",
+                "asset_id": f"AST-{index:07d}",
+                "name": name,
+                "category": category,
+                "status": pick(rng, ASSET_STATUSES),
+                "purchase_date": purchased.date().isoformat(),
+                "purchase_value": value,
+                "current_value": round(value * max(0.1, 1 - 0.2 * age_years)),
+                "serial_number": f"SN{rng.getrandbits(40):012X}",
+                "manufacturer": name.split(" ")[0],
+                "warranty_expiry": (purchased + timedelta(days=365 * rng.choice([1, 2, 3]))).date().isoformat(),
+                "assigned_to_email": skewed(rng, holders)["email"] if rng.random() < 0.85 else "",
+                "owner_email": users[0]["email"],
+                "location": f"Building {rng.randint(1, 5)}, Floor {rng.randint(1, 12)}",
+                "notes": "",
+                "created_date": created.isoformat(),
+            })
+        yield "assets", batch
+
+    def dated_batches(collection, build):
+        for start in range(0, counts[collection], BATCH_SIZE):
+            stop = min(start + BATCH_SIZE, counts[collection])
+            yield collection, [build(index) for index in range(start, stop)]
+
+    def loan(index):
+        borrower = skewed(rng, holders)
+        asset_id, asset_name = rng.choice(asset_names)
+        loaned = when(rng, now, 365)
+        return {
+            "id": f"syn-loan-{index:07d}",
+            "asset_id": asset_id,
+            "asset_name": asset_name,
+            "borrower_email": borrower["email"],
+            "borrower_name": borrower["full_name"],
+            "loan_date": loaned.date().isoformat(),
+            "expected_return_date": (loaned + timedelta(days=rng.choice([7, 14, 30, 90]))).date().isoformat(),
+            "purpose": rng.choice(["Client visit", "Remote work", "Conference", "Project"]),
+            "condition_at_loan": rng.choice(["new", "good", "fair"]),
+            "status": pick(rng, LOAN_STATUSES),
+            "created_by": borrower["email"] if rng.random() < 0.8 else rng.choice(users)["email"],
+            "created_date": loaned.isoformat(),
+        }
+
+    def maintenance(index):
+        asset_id, asset_name = rng.choice(asset_names)
+        created = when(rng, now, 365)
+        return {
+            "id": f"syn-maint-{index:07d}",
+            "asset_id": asset_id,
+            "asset_name": asset_name,
+            "title": rng.choice(["Battery replacement", "Screen repair", "Annual service", "Fan noise"]),
+            "description": "Synthetic maintenance request.",
+            "priority": rng.choice(["low", "medium", "medium", "high", "critical"]),
+            "status": pick(rng, MAINTENANCE_STATUSES),
+            "scheduled_date": (created + timedelta(days=rng.randint(1, 30))).date().isoformat(),
+            "estimated_cost": rng.randint(500, 50_000),
+            "technician": rng.choice(["In-house", "Vendor Tech", ""]),
+            "created_by": skewed(rng, holders)["email"],
+            "created_date": created.isoformat(),
+        }
+
+    def procurement(index):
+        quantity = rng.choice([1, 1, 2, 5, 10, 25])
+        estimated = rng.randint(1_000, 150_000)
+        return {
+            "id": f"syn-proc-{index:07d}",
+            "item_name": f"{rng.choice(SEARCH_WORDS).title()} x{quantity}",
+            "category": rng.choice(list(ASSET_CATEGORIES)),
+            "quantity": quantity,
+            "estimated_cost": estimated,
+            "total_cost": estimated * quantity,
+            "justification": "Synthetic procurement request.",
+            "urgency": rng.choice(["low", "medium", "high"]),
+            "status": pick(rng, PROCUREMENT_STATUSES),
+            "created_by": skewed(rng, holders)["email"],
+            "created_date": when(rng, now, 365).isoformat(),
+        }
+
+    def activity(index):
+        user = skewed(rng, users)
+        _, asset_name = rng.choice(asset_names)
+        action = rng.choice(ACTIONS)
+        return {
+            "id": f"syn-act-{index:07d}",
+            "user_email": user["email"],
+            "user_name": user["full_name"],
+            "action": action,
+            "details": f'{action.lower().replace("_", " ")}: "{asset_name}".',
+            "asset_name": asset_name,
+            "created_date": when(rng, now, 180).isoformat(),
+        }
+
+    def notification(index):
+        created = when(rng, now, 90)
+        return {
+            "id": f"syn-notif-{index:07d}",
+            "user_email": skewed(rng, users)["email"],
+            "title": rng.choice(["Loan due soon", "Maintenance approved", "Procurement updated"]),
+            "message": "Synthetic notification.",
+            # Older notifications are more likely to have been read.
+            "read": rng.random() < min(0.95, (now - created).days / 60),
+            "created_date": created.isoformat(),
+        }
+
+    yield from dated_batches("loans", loan)
+    yield from dated_batches("maintenances", maintenance)
+    yield from dated_batches("procurements", procurement)
+    yield from dated_batches("activities", activity)
+    yield from dated_batches("notifications", notification)
+
+
+def seed(backend, scale, seed=42):
+    """Insert a synthetic dataset through ``backend``; returns {collection: count}."""
+    counts = {}
+    for collection, documents in generate(scale, seed):
+        backend.db_insert_many(collection, documents)
+        counts[collection] = counts.get(collection, 0) + len(documents)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_DIR)
+    import backend
+
+    started = time.perf_counter()
+    counts = seed(backend, args.scale, args.seed)
+    elapsed = time.perf_counter() - started
+    summary = ", ".join(f"{count} {collection}" for collection, count in counts.items())
+    print(f"Seeded {backend.DB_PATH} with {summary} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
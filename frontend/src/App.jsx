@@ -19,7 +19,7 @@ import UsersPage from './pages/Users.jsx';
 const THEME_KEY = 'assetflow-theme';
 
 function AppInner() {
-  const { refreshCollections, data, loading, error } = useAppContext();
+  const { refreshCollections, subscribe, data, loading, error } = useAppContext();
   const [user, setUser] = useState(null);
   const [authStatus, setAuthStatus] = useState('idle'); // idle | loading | ready
   const [currentPage, setCurrentPage] = useState('dashboard');
@@ -75,13 +75,11 @@ function AppInner() {
     restoreSession();
   }, [restoreSession]);
 
+  // Live updates for as long as someone is signed in; closed on sign-out.
   useEffect(() => {
     if (!user) return;
-    const interval = setInterval(() => {
-      refreshCollections().catch((err) => console.error('Background refresh failed', err));
-    }, 60000);
-    return () => clearInterval(interval);
-  }, [user, refreshCollections]);
+    return subscribe();
+  }, [user, subscribe]);
 
   const handleRequestOtp = async (email) => {
     setAuthStatus('loading');
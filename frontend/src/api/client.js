@@ -1,5 +1,7 @@
 const API_BASE_URL = '/api';
 
+const LIST_PAGE_SIZE = 1000;
+
 const getAuthEmail = () => localStorage.getItem('authEmail') || '';
 
 async function request(endpoint, options = {}) {
@@ -58,7 +60,27 @@ export const api = {
       method: 'POST',
       body: JSON.stringify({ email }),
     }),
-  list: (collection) => request(`/${collection}`),
+  // Walks the keyset pages instead of asking for ?all=true, so every request
+  // is short and parallel loads don't hold server connections for long.
+  list: async (collection) => {
+    const items = [];
+    let cursor;
+    do {
+      const page = await api.listPage(collection, { limit: LIST_PAGE_SIZE, cursor });
+      items.push(...page.items);
+      cursor = page.next_cursor;
+    } while (cursor);
+    return items;
+  },
+  listPage: (collection, { limit, cursor } = {}) => {
+    const params = new URLSearchParams();
+    if (limit) params.set('limit', limit);
+    if (cursor) params.set('cursor', cursor);
+    const query = params.toString();
+    return request(`/${collection}${query ? `?${query}` : ''}`);
+  },
+  changes: (collection, since) =>
+    request(`/${collection}/changes${since === undefined ? '' : `?since=${since}`}`),
   create: (collection, payload) =>
     request(`/${collection}`, {
       method: 'POST',
@@ -73,10 +95,24 @@ export const api = {
     request(`/${collection}/${id}`, {
       method: 'DELETE',
     }),
+  search: (q, collections) =>
+    request(
+      `/search?q=${encodeURIComponent(q)}${collections ? `&collections=${collections.join(',')}` : ''}`,
+    ),
+  dashboardSummary: () => request('/dashboard/summary'),
   markAllNotificationsRead: () =>
     request('/notifications/mark_all_read', {
       method: 'PUT',
     }),
+  // EventSource can't send headers, so the session email goes in the query
+  // string. It reconnects on its own, resuming from the last event id.
+  subscribeEvents: () =>
+    new EventSource(`${API_BASE_URL}/events?email=${encodeURIComponent(getAuthEmail())}`),
+  markNotificationsRead: (ids) =>
+    request('/notifications/mark_read', {
+      method: 'PUT',
+      body: JSON.stringify({ ids }),
+    }),
   uploadPropertyImage: async (file) => {
     const formData = new FormData();
     formData.append('file', file);
@@ -128,9 +164,22 @@ export const api = {
     if (email) {
       headers.set('X-User-Email', email);
     }
-    const response = await fetch(`${API_BASE_URL}/reports/assets/pdf`, {
+    // The server answers 202 with a job while the report is being built;
+    // poll the job until the cached PDF is ready.
+    let response = await fetch(`${API_BASE_URL}/reports/assets/pdf`, {
       headers,
     });
+    if (response.status === 202) {
+      let job = await response.json();
+      while (job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        job = await request(job.status_url.replace(API_BASE_URL, ''));
+      }
+      if (job.status !== 'done') {
+        throw new Error(job.error || 'Failed to generate PDF');
+      }
+      response = await fetch(job.download_url, { headers });
+    }
     if (!response.ok) {
       const data = await response.json().catch(() => ({}));
       throw new Error(data.error || 'Failed to download PDF');
@@ -13,28 +13,74 @@ const COLLECTIONS = [
   'users',
 ];
 
+// Used only while the server refuses the event stream.
+const POLL_INTERVAL_MS = 60000;
+
 const initialState = {
   loading: false,
   error: null,
+  // Changes that arrive during a reload, applied once it lands.
+  pendingChanges: [],
+  // Bumped whenever data changes, for views that fetch their own (e.g. the dashboard).
+  changeRevision: 0,
   data: COLLECTIONS.reduce((acc, name) => {
     acc[name] = [];
     return acc;
   }, {}),
 };
 
+// Applies a change event ({ collection, op, id, document }) to the loaded
+// collections. Lists are newest first, so new documents go on top.
+function applyChange(data, { collection, op, id, document }) {
+  const items = data[collection];
+  if (!items) return data;
+  if (op === 'delete') {
+    return { ...data, [collection]: items.filter((item) => item.id !== id) };
+  }
+  const exists = items.some((item) => item.id === id);
+  return {
+    ...data,
+    [collection]: exists
+      ? items.map((item) => (item.id === id ? document : item))
+      : [document, ...items],
+  };
+}
+
 function reducer(state, action) {
   switch (action.type) {
     case 'LOADING':
       return { ...state, loading: true, error: null };
     case 'ERROR':
-      return { ...state, loading: false, error: action.error };
+      return {
+        ...state,
+        loading: false,
+        error: action.error,
+        pendingChanges: [],
+        data: state.pendingChanges.reduce(applyChange, state.data),
+      };
     case 'SET_COLLECTIONS':
       return {
         ...state,
         loading: false,
         error: null,
-        data: { ...state.data, ...action.payload },
+        pendingChanges: [],
+        data: state.pendingChanges.reduce(applyChange, { ...state.data, ...action.payload }),
       };
+    case 'APPLY_CHANGES':
+      if (state.loading) {
+        return {
+          ...state,
+          changeRevision: state.changeRevision + 1,
+          pendingChanges: [...state.pendingChanges, ...action.changes],
+        };
+      }
+      return {
+        ...state,
+        changeRevision: state.changeRevision + 1,
+        data: action.changes.reduce(applyChange, state.data),
+      };
+    case 'CHANGES_MISSED':
+      return { ...state, changeRevision: state.changeRevision + 1 };
     case 'UPDATE_COLLECTION':
       return {
         ...state,
@@ -76,34 +122,74 @@ export function AppProvider({ children }) {
     [],
   );
 
+  // Opens the event stream and applies its changes in place; returns a
+  // function that closes it. Changes are batched per animation frame so a
+  // bulk import doesn't re-render once per document.
+  const subscribe = useCallback(() => {
+    const source = api.subscribeEvents();
+    let queued = [];
+    let frame = null;
+    let pollTimer = null;
+    const flush = () => {
+      frame = null;
+      dispatch({ type: 'APPLY_CHANGES', changes: queued });
+      queued = [];
+    };
+    const reload = () => {
+      dispatch({ type: 'CHANGES_MISSED' });
+      refreshCollections().catch((error) => console.error('Background refresh failed', error));
+    };
+    source.addEventListener('change', (event) => {
+      queued.push(JSON.parse(event.data));
+      if (frame === null) frame = requestAnimationFrame(flush);
+    });
+    // Sent when the server can't replay what this client missed.
+    source.addEventListener('resync', reload);
+    source.onerror = () => {
+      // A refused stream (e.g. too many subscribers) is not retried by the
+      // browser, so poll instead; dropped connections reconnect on their own.
+      if (source.readyState === EventSource.CLOSED && pollTimer === null) {
+        pollTimer = setInterval(reload, POLL_INTERVAL_MS);
+      }
+    };
+    return () => {
+      source.close();
+      if (frame !== null) cancelAnimationFrame(frame);
+      clearInterval(pollTimer);
+    };
+  }, [refreshCollections]);
+
   const value = useMemo(
     () => ({
       ...state,
       refreshCollections,
+      subscribe,
       collections: COLLECTIONS,
       setCollection: (collection, items) =>
         dispatch({ type: 'UPDATE_COLLECTION', collection, payload: items }),
       async create(collection, payload) {
         const created = await api.create(collection, payload);
-        const items = state.data[collection] || [];
-        dispatch({ type: 'UPDATE_COLLECTION', collection, payload: [created, ...items] });
+        // Applied like the change event that follows, which then changes nothing.
+        dispatch({
+          type: 'APPLY_CHANGES',
+          changes: [{ collection, op: 'create', id: created.id, document: created }],
+        });
         return created;
       },
       async update(collection, id, payload) {
         const updated = await api.update(collection, id, payload);
-        const items = (state.data[collection] || []).map((item) =>
-          item.id === id ? updated : item,
-        );
-        dispatch({ type: 'UPDATE_COLLECTION', collection, payload: items });
+        dispatch({
+          type: 'APPLY_CHANGES',
+          changes: [{ collection, op: 'update', id, document: updated }],
+        });
         return updated;
       },
       async remove(collection, id) {
         await api.remove(collection, id);
-        const items = (state.data[collection] || []).filter((item) => item.id !== id);
-        dispatch({ type: 'UPDATE_COLLECTION', collection, payload: items });
+        dispatch({ type: 'APPLY_CHANGES', changes: [{ collection, op: 'delete', id }] });
       },
     }),
-    [state, refreshCollections],
+    [state, refreshCollections, subscribe],
   );
 
   return <AppContext.Provider value={value}>{children}</AppContext.Provider>;
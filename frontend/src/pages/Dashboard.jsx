@@ -1,68 +1,70 @@
-import { useEffect, useMemo, useRef } from 'react';
+import { useEffect, useMemo, useRef, useState } from 'react';
 import Chart from 'chart.js/auto';
 import { format, parseISO, formatDistanceToNow } from 'date-fns';
 import { useAppContext } from '../context/AppContext';
+import { api } from '../api/client';
+
+// Refetches wait this long after a change so a burst of them costs one request.
+const SUMMARY_REFRESH_DELAY_MS = 500;
+
+const EMPTY_SUMMARY = {
+  assets: { total: 0, total_value: 0, by_category: {} },
+  properties: { total: 0, total_value: 0 },
+  loans: { active: 0, overdue: 0 },
+  maintenances: { open: 0 },
+  procurements: { pending: 0 },
+  notifications: { total: 0 },
+  recent: { assets: [], properties: [], loans: [], activities: [] },
+};
 
 export default function Dashboard() {
-  const { data } = useAppContext();
+  // Everything shown comes from the summary endpoint, so the dashboard
+  // doesn't wait for the collections to load; change events trigger a refetch.
+  const { changeRevision } = useAppContext();
   const chartRef = useRef(null);
   const chartInstance = useRef(null);
+  const [summary, setSummary] = useState(EMPTY_SUMMARY);
+  const requestSeq = useRef(0);
 
-  const assets = data.assets || [];
-  const properties = data.properties || [];
-  const loans = data.loans || [];
-  const maintenances = data.maintenances || [];
-  const procurements = data.procurements || [];
-  const notifications = data.notifications || [];
-
-  const stats = useMemo(() => {
-    const totalValue = assets.reduce((acc, asset) => acc + (Number(asset.current_value) || 0), 0);
-    const activeLoans = (data.loans || []).filter((loan) => loan.status === 'active').length;
-    const overdueLoans = (data.loans || []).filter((loan) => {
-      if (loan.status !== 'active') return false;
-      try {
-        const due = parseISO(loan.expected_return_date);
-        return due < new Date();
-      } catch (error) {
-        return false;
-      }
-    }).length;
-    const openMaintenance = maintenances.filter((item) =>
-      ['pending', 'approved', 'in_progress'].includes(item.status),
-    ).length;
-    const pendingProcurement = procurements.filter((item) =>
-      ['pending', 'manager_approved'].includes(item.status),
-    ).length;
-
-    const totalPropertyValue = properties.reduce(
-      (acc, prop) => acc + (Number(prop.price || prop.monthly_cost || 0) || 0),
-      0,
+  useEffect(() => {
+    const timer = setTimeout(
+      () => {
+        const seq = ++requestSeq.current;
+        api
+          .dashboardSummary()
+          .then((result) => {
+            // Replies can arrive out of order; only the newest request's is shown.
+            if (seq === requestSeq.current) setSummary(result);
+          })
+          .catch((error) => console.error('Failed to load dashboard summary', error));
+      },
+      requestSeq.current ? SUMMARY_REFRESH_DELAY_MS : 0,
     );
+    return () => clearTimeout(timer);
+  }, [changeRevision]);
 
-    return {
-      totalAssets: assets.length,
-      totalProperties: properties.length,
-      totalValue,
-      totalPropertyValue,
-      activeLoans,
-      overdueLoans,
-      openMaintenance,
-      pendingProcurement,
-      notifications: notifications.length,
-    };
-  }, [assets, properties, maintenances, procurements, notifications, data.loans]);
+  const stats = useMemo(
+    () => ({
+      totalAssets: summary.assets.total,
+      totalProperties: summary.properties.total,
+      totalValue: summary.assets.total_value,
+      totalPropertyValue: summary.properties.total_value,
+      activeLoans: summary.loans.active,
+      overdueLoans: summary.loans.overdue,
+      openMaintenance: summary.maintenances.open,
+      pendingProcurement: summary.procurements.pending,
+      notifications: summary.notifications.total,
+    }),
+    [summary],
+  );
 
   const chartData = useMemo(() => {
-    const counts = assets.reduce((acc, asset) => {
-      const key = asset.category || 'other';
-      acc[key] = (acc[key] || 0) + 1;
-      return acc;
-    }, {});
+    const counts = summary.assets.by_category;
     return {
       labels: Object.keys(counts),
       values: Object.values(counts),
     };
-  }, [assets]);
+  }, [summary]);
 
   useEffect(() => {
     if (!chartRef.current) return;
@@ -105,29 +107,11 @@ export default function Dashboard() {
     };
   }, [chartData]);
 
-  const recentAssets = useMemo(() => {
-    return [...assets]
-      .sort((a, b) => new Date(b.created_date || 0) - new Date(a.created_date || 0))
-      .slice(0, 5);
-  }, [assets]);
-
-  const recentProperties = useMemo(() => {
-    return [...properties]
-      .sort((a, b) => new Date(b.created_date || 0) - new Date(a.created_date || 0))
-      .slice(0, 5);
-  }, [properties]);
-
-  const recentLoans = useMemo(() => {
-    return [...loans]
-      .sort((a, b) => new Date(b.created_date || b.loan_date || 0) - new Date(a.created_date || a.loan_date || 0))
-      .slice(0, 5);
-  }, [loans]);
-
-  const activityFeed = useMemo(() => {
-    return [...(data.activities || [])]
-      .sort((a, b) => new Date(b.created_date || 0) - new Date(a.created_date || 0))
-      .slice(0, 6);
-  }, [data.activities]);
+  // Newest first, as the summary returns them.
+  const recentAssets = summary.recent.assets;
+  const recentProperties = summary.recent.properties;
+  const recentLoans = summary.recent.loans;
+  const activityFeed = summary.recent.activities;
 
   return (
     <div className="space-y-6">
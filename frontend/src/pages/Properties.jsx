@@ -17,6 +17,9 @@ const PROPERTY_TYPES = [
 const OWNERSHIP = ['owned', 'leased', 'rented'];
 const STATUSES = ['active', 'vacant', 'under_renovation', 'for_sale', 'retired'];
 
+// Uploaded images are served in resized variants; other URLs are used as-is.
+const imageVariant = (url, size) => (url.startsWith('/api/uploads/') ? `${url}?size=${size}` : url);
+
 export default function PropertiesPage({ showToast }) {
   const { data, create, update, remove } = useAppContext();
   const properties = data.properties || [];
@@ -133,7 +136,7 @@ export default function PropertiesPage({ showToast }) {
                 onClick={() => setDetailsModal(property)}
               >
                 <img
-                  src={property.image_url}
+                  src={imageVariant(property.image_url, 'thumb')}
                   alt={property.property_name}
                   className="w-full h-full object-cover"
                   onError={(e) => {
@@ -386,7 +389,7 @@ export default function PropertiesPage({ showToast }) {
             {detailsModal.image_url && (
               <div className="rounded-lg overflow-hidden">
                 <img
-                  src={detailsModal.image_url}
+                  src={imageVariant(detailsModal.image_url, 'preview')}
                   alt={detailsModal.property_name}
                   className="w-full h-64 object-cover"
                   onError={(e) => {
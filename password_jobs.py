@@ -0,0 +1,34 @@
+"""Password hashing jobs run by backend.PASSWORD_HASHER's worker processes.
+
+The fork server preloads this module (spawn workers import it on their
+first job), so it must stay free of import-time side effects: no app,
+database or threads. Workers also import the entry script, which is why
+``python backend.py`` does not start them.
+"""
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+def hash_password(password, method):
+    return generate_password_hash(password, method)
+
+
+def verify_password(stored_hash, password, method, method_prefix):
+    """Check a password; if it matches a hash with outdated parameters, also return a fresh hash."""
+    if not check_password_hash(stored_hash, password):
+        return False, None
+    if stored_hash.split("$", 1)[0] == method_prefix:
+        return True, None
+    return True, generate_password_hash(password, method)
+
+
+def method_prefix(method):
+    """The parameter prefix (e.g. ``scrypt:32768:8:1``) werkzeug writes for ``method``, without hashing."""
+    name, *args = method.split(":")
+    if name == "scrypt":
+        n, r, p = map(int, args) if args else (2**15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Invalid hash method '{method}'.")
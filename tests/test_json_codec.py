@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pytest
+
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backend  # noqa: E402
+
+needs_orjson = pytest.mark.skipif(backend.JSON_CODEC != "orjson", reason="JSON_CODEC is not orjson")
+
+
+@pytest.fixture
+def orjson_calls(monkeypatch):
+    """Record the options of every orjson.dumps call made by the backend."""
+    calls = []
+    real = backend.orjson
+
+    class RecordingOrjson:
+        def __getattr__(self, name):
+            return getattr(real, name)
+
+        def dumps(self, obj, **kwargs):
+            calls.append(kwargs.get("option", 0))
+            return real.dumps(obj, **kwargs)
+
+    monkeypatch.setattr(backend, "orjson", RecordingOrjson())
+    return calls
+
+
+def jsonify_text(value):
+    with backend.app.test_request_context():
+        return backend.jsonify(value).get_data(as_text=True)
+
+
+@needs_orjson
+def test_jsonify_uses_orjson(orjson_calls):
+    value = {"name": "Laptop é", "b": [1, 2.5, None, True], "a": {"z": 1, "y": 2}}
+    assert jsonify_text(value) == json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False) + "\n"
+    assert orjson_calls == [backend.orjson.OPT_PASSTHROUGH_DATETIME | backend.orjson.OPT_SORT_KEYS]
+
+
+@needs_orjson
+def test_jsonify_indented_uses_orjson(orjson_calls, monkeypatch):
+    monkeypatch.setattr(backend.app.json, "compact", False)
+    value = {"b": [1, {}], "a": []}
+    assert jsonify_text(value) == json.dumps(value, sort_keys=True, indent=2) + "\n"
+    assert len(orjson_calls) == 1 and orjson_calls[0] & backend.orjson.OPT_INDENT_2
+
+
+@needs_orjson
+def test_jsonify_dates_match_stdlib(orjson_calls):
+    value = {"at": datetime(2024, 1, 15, 9, 30)}
+    assert json.loads(jsonify_text(value)) == {"at": "Mon, 15 Jan 2024 09:30:00 GMT"}
+    assert orjson_calls
+
+
+def test_jsonify_falls_back_to_stdlib_for_unsupported_values():
+    assert json.loads(jsonify_text({1: 2**70})) == {"1": 2**70}
@@ -0,0 +1,115 @@
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backend  # noqa: E402
+
+COLLECTION = "assets"
+
+LEGACY_DOCUMENTS = [
+    {"id": "a1", "name": "Laptop", "created_date": "2024-01-01T09:00:00", "current_value": 1500.0, "purchase_value": 2000},
+    {"id": "a2", "name": "No dates or values"},
+    {"id": "a3", "name": "Odd types", "created_date": 12345, "purchase_date": None, "status": True, "current_value": "1200"},
+    {"id": "a4", "created_date": "2024-02-01", "current_value": 0.1, "purchase_value": 2**70, "specs": {"ram": [8, 2.5]}},
+    {"id": "a5", "name": "Ünïcode", "created_date": "", "warranty_expiry": None, "custom_field": "kept"},
+    {"id": "a6", "name": "Float date", "created_date": 1.0, "location": {"floor": 2}},
+]
+
+
+def canonical(text):
+    """The document's JSON with keys sorted: typed tables may order keys differently, nothing else."""
+    return json.dumps(json.loads(text), sort_keys=True)
+
+
+def stored_documents(table):
+    with backend.db_connection() as conn:
+        rows = conn.execute(
+            f"SELECT id, version, document FROM {table} WHERE collection = ?", (COLLECTION,)
+        ).fetchall()
+    return {row["id"]: (row["version"], canonical(row["document"])) for row in rows}
+
+
+@pytest.fixture
+def legacy_collection():
+    """Put COLLECTION back in the legacy ``records`` table, holding LEGACY_DOCUMENTS."""
+    table = backend.typed_table(COLLECTION)
+    with backend.db_transaction() as conn:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute("DELETE FROM records WHERE collection = ?", (COLLECTION,))
+        conn.executemany(
+            "INSERT INTO records (id, collection, document) VALUES (?, ?, ?)",
+            [(document["id"], COLLECTION, json.dumps(document)) for document in LEGACY_DOCUMENTS],
+        )
+        conn.execute(
+            "UPDATE storage_migration SET phase = 'records', copied_through = '' WHERE collection = ?",
+            (COLLECTION,),
+        )
+    backend._typed_collections.discard(COLLECTION)
+    yield
+    backend._typed_collections.discard(COLLECTION)
+
+
+def test_migration_round_trips_documents(legacy_collection):
+    before = stored_documents("records")
+
+    assert backend.migrate_collection_storage(COLLECTION, batch_size=4) == len(LEGACY_DOCUMENTS)
+
+    with backend.db_connection() as conn:
+        assert backend.storage_phase(conn, COLLECTION) == "typed"
+    assert stored_documents(backend.typed_table(COLLECTION)) == before
+    for document in LEGACY_DOCUMENTS:
+        assert canonical(backend.db_get(COLLECTION, document["id"], raw=True)) == json.dumps(document, sort_keys=True)
+
+
+def test_migrated_collection_pages_through_every_document(legacy_collection):
+    backend.migrate_collection_storage(COLLECTION)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = backend.db_page(COLLECTION, 2, cursor)
+        seen.extend(document["id"] for document in page)
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(document["id"] for document in LEGACY_DOCUMENTS)
+    assert seen == [document["id"] for document in backend.db_list(COLLECTION)]
+
+
+def test_writes_while_copying_reach_the_typed_table(legacy_collection, monkeypatch):
+    real_typed_row = backend.typed_row
+    calls = []
+
+    def interrupted_typed_row(*args):
+        calls.append(args)
+        if len(calls) > 2:
+            raise RuntimeError("interrupted")
+        return real_typed_row(*args)
+
+    # Stop after the first batch of two, leaving the collection in the copying phase.
+    monkeypatch.setattr(backend, "typed_row", interrupted_typed_row)
+    with pytest.raises(RuntimeError):
+        backend.migrate_collection_storage(COLLECTION, batch_size=2)
+    monkeypatch.setattr(backend, "typed_row", real_typed_row)
+    with backend.db_connection() as conn:
+        assert backend.storage_phase(conn, COLLECTION) == "copying"
+    assert set(stored_documents(backend.typed_table(COLLECTION))) == {"a1", "a2"}
+
+    backend.db_update(COLLECTION, "a1", {"current_value": 1499.5, "notes": None})
+    backend.db_update(COLLECTION, "a4", {"created_date": 67890, "name": "Renamed"})
+    backend.db_delete(COLLECTION, "a2")
+    backend.db_delete(COLLECTION, "a5")
+    backend.db_insert(COLLECTION, {"id": "a0", "name": "Added while copying", "purchase_value": 10.0})
+    backend.db_insert(COLLECTION, {"id": "a9", "name": "Added while copying"})
+
+    backend.migrate_collection_storage(COLLECTION, batch_size=2)
+
+    records = stored_documents("records")
+    assert set(records) == {"a0", "a1", "a3", "a4", "a6", "a9"}
+    assert stored_documents(backend.typed_table(COLLECTION)) == records
+    assert json.loads(records["a1"][1])["current_value"] == 1499.5
+    assert json.loads(records["a4"][1])["created_date"] == 67890